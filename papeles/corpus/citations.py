@@ -0,0 +1,122 @@
+import pickle
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from papeles.corpus.corpus import Corpus
+from papeles.paper.neurips import get_key
+from papeles.utils import paper
+
+_NON_ALPHANUMERIC_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lowercase title with only alphanumeric words, so the same paper cited with a different
+    case, punctuation or line breaks maps to the same entry
+    """
+    return _NON_ALPHANUMERIC_RE.sub(' ', title.lower()).strip()
+
+
+class CitationIndex:
+    """
+    Inverted index of the references of a corpus, by normalized title (see normalize_title).
+
+    Citations are counted once per citing paper and per year of the citing paper when the
+    index is built, so "which papers cite X" and "most cited titles per year" are dictionary
+    lookups, and the index can be saved (pickle) to skip parsing every pdf again.
+    """
+    def __init__(self):
+        self.titles: Dict[str, str] = {}
+        self.citing: Dict[str, Set[str]] = defaultdict(set)
+        self.references: Dict[str, List[str]] = {}
+        self.years: Dict[str, Optional[int]] = {}
+        self.counts: Dict[Optional[int], Counter] = defaultdict(Counter)
+        self._ranked: Dict[Optional[int], List[Tuple[str, int]]] = {}
+
+    def add(self,
+            paper_key: str,
+            references: Iterable[paper.Reference],
+            year: Optional[int] = None) -> None:
+        """
+        Adds the references of a paper, replacing any references previously added for it
+        """
+        if paper_key in self.references:
+            self.remove(paper_key)
+        titles: List[str] = []
+        seen: Set[str] = set()
+        for reference in references:
+            title = normalize_title(reference.title)
+            if not title or title in seen:
+                continue
+            seen.add(title)
+            titles.append(title)
+            self.titles.setdefault(title, reference.title)
+            self.citing[title].add(paper_key)
+            self.counts[year][title] += 1
+        self.references[paper_key] = titles
+        self.years[paper_key] = year
+        self._ranked.clear()
+
+    def remove(self, paper_key: str) -> None:
+        year = self.years.pop(paper_key)
+        for title in self.references.pop(paper_key):
+            self.citing[title].discard(paper_key)
+            self.counts[year][title] -= 1
+            if not self.citing[title]:
+                del self.citing[title]
+                del self.titles[title]
+            if not self.counts[year][title]:
+                del self.counts[year][title]
+        self._ranked.clear()
+
+    @classmethod
+    def from_corpus(cls, corpus: Corpus, key: Callable[[str], str] = get_key) -> 'CitationIndex':
+        """
+        Extracts every file in corpus (see Corpus.texts) and indexes its references, using
+        key(file name) as the paper key and the year from the corpus metadata
+        """
+        index = cls()
+        for file, pages in corpus.texts():
+            index.add(key(file), paper.get_references(list(paper.flatten(pages))),
+                      corpus.metadata.get(file, {}).get('year'))
+        return index
+
+    def cited_by(self, title: str) -> Set[str]:
+        """
+        Paper keys of the papers citing title
+        """
+        return self.citing.get(normalize_title(title), set())
+
+    def most_cited(self, year: Optional[int] = None, n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Most cited titles by the papers of a given year (or the whole corpus without year),
+        with the number of papers citing them
+        """
+        if year not in self._ranked:
+            if year is None:
+                counts = Counter({title: len(keys) for title, keys in self.citing.items()})
+            else:
+                counts = self.counts.get(year, Counter())
+            self._ranked[year] = [(self.titles[title], count)
+                                  for title, count in counts.most_common()]
+        return self._ranked[year][:n]
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            pickle.dump(
+                (self.titles, dict(self.citing), self.references, dict(self.counts), self.years),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'CitationIndex':
+        index = cls()
+        with open(path, 'rb') as f:
+            index.titles, citing, index.references, counts, index.years = pickle.load(f)
+        index.citing.update(citing)
+        index.counts.update(counts)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.references)
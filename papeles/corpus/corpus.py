@@ -0,0 +1,87 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from papeles.utils import pdf_batch, pdf_parser
+
+
+class Corpus(Mapping[str, Iterable[List[str]]]):
+    """
+    Lazy collection of pdf files, mapping each key (file name) to the pages of the file as
+    returned by pdf_parser.get_text.
+
+    Files are only opened while their pages are being read, so memory and open file handles
+    stay constant no matter how large the corpus is. The corpus can be sized, sliced
+    (e.g. corpus[:10]) and filtered by year or metadata without reading any file.
+    """
+    def __init__(self,
+                 paths: Dict[str, str],
+                 metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+                 processes: Optional[int] = None,
+                 limits: Optional[pdf_batch.Limits] = None,
+                 quarantine: Optional[pdf_batch.Quarantine] = None,
+                 **text_options: Any):
+        self.paths = paths
+        self.metadata = metadata or {}
+        self.processes = processes
+        self.limits = limits
+        self.quarantine = quarantine
+        self.text_options = text_options
+
+    def _subset(self, keys: Iterable[str]) -> 'Corpus':
+        paths = {k: self.paths[k] for k in keys}
+        metadata = {k: self.metadata[k] for k in paths if k in self.metadata}
+        return Corpus(paths,
+                      metadata,
+                      processes=self.processes,
+                      limits=self.limits,
+                      quarantine=self.quarantine,
+                      **self.text_options)
+
+    def __getitem__(self, key: Union[str, slice]) -> Any:
+        if isinstance(key, slice):
+            return self._subset(list(self.paths)[key])
+        return pdf_parser.get_text(self.paths[key], local=True, **self.text_options)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def filter(self,
+               year: Optional[int] = None,
+               predicate: Optional[Callable[[str, Dict[str, Any]], bool]] = None) -> 'Corpus':
+        """
+        Subset of the corpus with the files from a given year and/or the files for which
+        predicate(key, metadata) is True
+        """
+        keys = []
+        for key in self.paths:
+            metadata = self.metadata.get(key, {})
+            if year is not None and metadata.get('year') != year:
+                continue
+            if predicate is not None and not predicate(key, metadata):
+                continue
+            keys.append(key)
+        return self._subset(keys)
+
+    def texts(self, ordered: bool = True) -> Iterable[Tuple[str, List[List[str]]]]:
+        """
+        Extracts all files returning tuples with (key, pages).
+
+        If the corpus has processes, files are extracted in parallel within the corpus limits
+        (see pdf_batch.get_texts). Otherwise they are extracted one at a time, in a single worker
+        process when there are limits or a quarantine so they still apply.
+        """
+        if self.processes is None and self.limits is None and self.quarantine is None:
+            for key in self.paths:
+                yield key, list(self[key])
+            return
+        keys = {path: key for key, path in self.paths.items()}
+        for path, pages in pdf_batch.get_texts(list(self.paths.values()),
+                                               local=True,
+                                               processes=self.processes or 1,
+                                               ordered=ordered,
+                                               limits=self.limits,
+                                               quarantine=self.quarantine,
+                                               **self.text_options):
+            yield keys[path], pages
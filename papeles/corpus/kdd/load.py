@@ -1,10 +1,15 @@
 import os
-from typing import Dict, Iterable, List
+from typing import Any, Optional
 
-from papeles.utils import pdf_parser
+from papeles.corpus.corpus import Corpus
+from papeles.utils import pdf_batch
 
 
-def load_folder(folder: str) -> Dict[str, Iterable[List[str]]]:
+def load_folder(folder: str,
+                processes: Optional[int] = None,
+                limits: Optional[pdf_batch.Limits] = None,
+                quarantine: Optional[pdf_batch.Quarantine] = None,
+                **text_options: Any) -> Corpus:
     """
     Loads data from the folder output using KDD data
 
@@ -16,8 +21,15 @@ def load_folder(folder: str) -> Dict[str, Iterable[List[str]]]:
      - papers_data.json is a metadata file for each paper in this conference
      - <files> are the raw PDF file for this conference
 
+    Files are parsed lazily when iterated. Corpus.texts extracts all of them using a pool with
+    processes (see pdf_batch.get_texts), where limits and quarantine isolate files that can't be
+    extracted. Files already in quarantine are skipped.
+    Any other option (e.g. cache, max_pages, stop) is forwarded to pdf_parser.get_text.
     """
-    files = {}
+    paths = {}
     for file in os.listdir(folder):
-        files[file] = pdf_parser.get_text(os.path.join(folder, file), local=True)
-    return files
+        path = os.path.join(folder, file)
+        if quarantine is not None and path in quarantine:
+            continue
+        paths[file] = path
+    return Corpus(paths, processes=processes, limits=limits, quarantine=quarantine, **text_options)
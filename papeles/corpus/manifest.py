@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ManifestDiff(NamedTuple):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: List[str]
+    incomplete: List[str]
+
+
+def file_hash(path: str) -> str:
+    """
+    sha256 of the content of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Records the size, mtime and content hash of each source pdf, plus the derived artifacts
+    (e.g. sentences, headers or keywords files) that were built from it.
+
+    A refresh only rebuilds the artifacts of added or changed sources and deletes the artifacts
+    of removed ones, so a yearly update costs the size of the new year, e.g.
+
+        manifest = Manifest('manifest.json')
+        manifest.refresh(glob.glob('output/data_*/pdfs/*.pdf'),
+                         {'sentences': write_sentences, 'headers': write_headers})
+
+    where each builder receives a source path and returns the paths of the files it wrote.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    def diff(self, sources: Iterable[str], builders: Iterable[str] = ()) -> ManifestDiff:
+        """
+        Compares sources against the manifest.
+
+        Size and mtime are checked first, and the content hash is only computed when they differ,
+        so touched but identical files count as unchanged (and their mtime is updated). Unchanged
+        sources without the artifacts of one of the given builder names (e.g. a new builder, or
+        an interrupted refresh) are incomplete.
+        """
+        builders = list(builders)
+        diff = ManifestDiff([], [], [], [], [])
+        seen = set()
+        for source in sources:
+            seen.add(source)
+            entry = self.entries.get(source)
+            if entry is None:
+                diff.added.append(source)
+                continue
+            stat = os.stat(source)
+            if entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+                if file_hash(source) != entry['sha256']:
+                    diff.changed.append(source)
+                    continue
+                entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime
+            if any(name not in entry['artifacts'] for name in builders):
+                diff.incomplete.append(source)
+            else:
+                diff.unchanged.append(source)
+        diff.removed.extend(source for source in self.entries if source not in seen)
+        return diff
+
+    def artifacts(self, source: str) -> Dict[str, List[str]]:
+        """
+        Artifacts built from source, by builder name
+        """
+        return self.entries.get(source, {}).get('artifacts', {})
+
+    def _remove_artifacts(self, source: str) -> None:
+        for paths in self.artifacts(source).values():
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def refresh(self, sources: Iterable[str],
+                builders: Dict[str, Callable[[str], Iterable[str]]]) -> ManifestDiff:
+        """
+        Rebuilds the artifacts for added and changed sources, builds the missing artifacts of
+        incomplete sources, and drops the artifacts for removed sources.
+
+        The manifest is saved after each builder, so the artifacts already built are kept (and
+        not built again) when a builder fails or the refresh is interrupted.
+        """
+        diff = self.diff(sources, builders)
+        for source in diff.removed:
+            self._remove_artifacts(source)
+            del self.entries[source]
+        self.save()
+        for source in diff.added + diff.changed:
+            self._remove_artifacts(source)
+            stat = os.stat(source)
+            self.entries[source] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': file_hash(source),
+                'artifacts': {}
+            }
+        self.save()
+        for source in diff.added + diff.changed + diff.incomplete:
+            artifacts = self.entries[source]['artifacts']
+            for name, builder in builders.items():
+                if name not in artifacts:
+                    artifacts[name] = list(builder(source))
+                    self.save()
+        return diff
+
+    def save(self) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
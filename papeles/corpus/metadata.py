@@ -0,0 +1,96 @@
+import json
+import os
+import pickle
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from papeles.paper.neurips import get_key
+
+
+class MetadataIndex(Mapping[str, Dict[str, Any]]):
+    """
+    Papers metadata (e.g. from papers_data.jsons) by pdf_name, with secondary indexes by
+    paper key (see papeles.paper.neurips.get_key) and year built once while loading.
+
+    The whole index can be saved in a compact binary form (pickle), so reloading it skips
+    json parsing entirely.
+    """
+    def __init__(self, records: Iterable[Dict[str, Any]] = (), year: Optional[int] = None):
+        self.records: List[Dict[str, Any]] = []
+        self.pdf_names: Dict[str, int] = {}
+        self.paper_keys: Dict[str, int] = {}
+        self.years: Dict[Optional[int], List[int]] = defaultdict(list)
+        for record in records:
+            self.add(record, year)
+
+    def add(self, record: Dict[str, Any], year: Optional[int] = None) -> None:
+        """
+        Adds a paper record, using year when the record doesn't have one
+        """
+        position = len(self.records)
+        self.records.append(record)
+        self.pdf_names[record['pdf_name']] = position
+        self.paper_keys[record.get('paper_key') or get_key(record['pdf_name'])] = position
+        self.years[record.get('year', year)].append(position)
+
+    @classmethod
+    def from_jsons(cls, path: str, year: Optional[int] = None) -> 'MetadataIndex':
+        """
+        Streams a json lines file (e.g. papers_data.jsons from neurips_crawler)
+        """
+        index = cls()
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    index.add(json.loads(line), year)
+        return index
+
+    @classmethod
+    def from_folder(cls, folder: str) -> 'MetadataIndex':
+        """
+        Loads a folder with one metadata json file per paper (e.g. files_metadata)
+        """
+        index = cls()
+        for file in os.listdir(folder):
+            with open(os.path.join(folder, file), 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        index.add(json.loads(line))
+        return index
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            pickle.dump((self.records, self.pdf_names, self.paper_keys, dict(self.years)),
+                        f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'MetadataIndex':
+        index = cls()
+        with open(path, 'rb') as f:
+            index.records, index.pdf_names, index.paper_keys, years = pickle.load(f)
+        index.years.update(years)
+        return index
+
+    def by_key(self, paper_key: str) -> Dict[str, Any]:
+        return self.records[self.paper_keys[paper_key]]
+
+    def by_year(self, year: int) -> List[Dict[str, Any]]:
+        return [self.records[i] for i in self.years.get(year, [])]
+
+    def year_pdf_names(self, year: int) -> List[str]:
+        """
+        Pdf names (the keys of the index) of every paper from a given year
+        """
+        return [self.records[i]['pdf_name'] for i in self.years.get(year, [])]
+
+    def __getitem__(self, pdf_name: str) -> Dict[str, Any]:
+        return self.records[self.pdf_names[pdf_name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.pdf_names)
+
+    def __len__(self) -> int:
+        return len(self.pdf_names)
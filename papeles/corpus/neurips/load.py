@@ -1,11 +1,16 @@
-import json
 import os
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Optional, Tuple
 
-from papeles.utils import pdf_parser
+from papeles.corpus.corpus import Corpus
+from papeles.corpus.metadata import MetadataIndex
+from papeles.utils import pdf_batch
 
 
-def load_folder(folder: str) -> Tuple[Dict[str, Iterable[List[str]]], Dict[str, Any]]:
+def load_folder(folder: str,
+                processes: Optional[int] = None,
+                limits: Optional[pdf_batch.Limits] = None,
+                quarantine: Optional[pdf_batch.Quarantine] = None,
+                **text_options: Any) -> Tuple[Corpus, MetadataIndex]:
     """
     Loads data from the folder output using neurips_crawler
 
@@ -17,13 +22,30 @@ def load_folder(folder: str) -> Tuple[Dict[str, Iterable[List[str]]], Dict[str,
      - papers_data.json is a metadata file for each paper in this conference
      - <files> are the raw PDF file for this conference
 
+    Files are parsed lazily when iterated. Corpus.texts extracts all of them using a pool with
+    processes (see pdf_batch.get_texts), where limits and quarantine isolate files that can't be
+    extracted. Files already in quarantine are skipped.
+    Any other option (e.g. cache, max_pages, stop) is forwarded to pdf_parser.get_text.
+
+    Metadata is returned as a MetadataIndex by pdf_name, indexed by year and paper key.
     """
-    year_data = {}
-    with open(os.path.join(folder, 'papers_data.jsons'), 'r') as f:
-        for line in f.readlines():
-            paper_data = json.loads(line.strip())
-            year_data[paper_data['pdf_name']] = paper_data
-    files = {}
+    year = os.path.basename(os.path.normpath(folder)).split('_')[-1]
+    year_data = MetadataIndex.from_jsons(os.path.join(folder, 'papers_data.jsons'),
+                                         int(year) if year.isdigit() else None)
+    paths = {}
+    metadata = {}
     for file in os.listdir(os.path.join(folder, 'pdfs')):
-        files[file] = pdf_parser.get_text(os.path.join(folder, 'pdfs', file), local=True)
+        path = os.path.join(folder, 'pdfs', file)
+        if quarantine is not None and path in quarantine:
+            continue
+        paths[file] = path
+        metadata[file] = dict(year_data.get(file, {}))
+        if year.isdigit():
+            metadata[file].setdefault('year', int(year))
+    files = Corpus(paths,
+                   metadata,
+                   processes=processes,
+                   limits=limits,
+                   quarantine=quarantine,
+                   **text_options)
     return files, year_data
@@ -0,0 +1,121 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from papeles.corpus.corpus import Corpus
+from papeles.paper.neurips import get_key
+from papeles.utils import paper
+
+_MAGIC = b'PAPELES1'
+
+# index offset, index length and magic at the end of the file
+_FOOTER = struct.Struct('<QQ8s')
+
+
+def build_record(pages: Iterable[List[str]], document_type: str = None) -> Dict[str, Any]:
+    """
+    Given the pages of a paper (paragraph -> lines), builds the record stored in a packed corpus
+    """
+    pages = [list(page) for page in pages]
+    sections = paper.segment(paper.flatten(pages), document_type)
+    return {
+        'pages': pages,
+        'header': sections.header,
+        'abstract': sections.abstract,
+        'sentences': sections.sentences
+    }
+
+
+def write_packed(path: str, records: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    Writes all (key, record) pairs into a single packed corpus file, returning how many records
+    were written.
+
+    Each field of a record is stored as json, followed by an index with the offset and length of
+    every field by key, so a single field can be read without decoding the rest of the record.
+    The file is written to a temporary path first, so readers never see a partial file.
+    Raises ValueError if a key is repeated (e.g. two files with the same get_key), the temporary
+    file is removed and path is left untouched.
+    """
+    index: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    tmp_path = f'{path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC)
+            offset = len(_MAGIC)
+            for key, record in records:
+                if key in index:
+                    raise ValueError(f'duplicate key {key!r} in packed corpus {path}')
+                index[key] = {}
+                for field, value in record.items():
+                    data = json.dumps(value).encode('utf-8')
+                    f.write(data)
+                    index[key][field] = (offset, len(data))
+                    offset += len(data)
+            index_data = json.dumps(index).encode('utf-8')
+            f.write(index_data)
+            f.write(_FOOTER.pack(offset, len(index_data), _MAGIC))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return len(index)
+
+
+def pack_corpus(corpus: Corpus,
+                path: str,
+                key: Callable[[str], str] = get_key,
+                document_type: str = None) -> int:
+    """
+    Extracts every file in corpus (see Corpus.texts) and writes them into a packed corpus file,
+    using key(file name) as the paper key (neurips get_key by default).
+    """
+    return write_packed(path, ((key(file), build_record(pages, document_type))
+                               for file, pages in corpus.texts()))
+
+
+class PackedCorpus(Mapping[str, Dict[str, Any]]):
+    """
+    Read only access to a packed corpus file (see write_packed).
+
+    The file is memory mapped, so opening it only reads the index and every record is decoded
+    on demand by paper key, without any per-paper file open/close.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a packed corpus file')
+        index_offset, index_length, _ = _FOOTER.unpack(self._mmap[-_FOOTER.size:])
+        self.index: Dict[str, Dict[str, List[int]]] = json.loads(
+            self._mmap[index_offset:index_offset + index_length])
+
+    def get_field(self, key: str, field: str) -> Any:
+        """
+        Decodes a single field (e.g. header) of the paper with the given key
+        """
+        offset, length = self.index[key][field]
+        return json.loads(self._mmap[offset:offset + length])
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        return {field: self.get_field(key, field) for field in self.index[key]}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'PackedCorpus':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
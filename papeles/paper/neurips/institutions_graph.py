@@ -7,6 +7,7 @@ import community
 import matplotlib.pyplot as plt
 import networkx as nx
 
+from papeles.corpus.metadata import MetadataIndex
 from papeles.paper.neurips import institutions
 
 
@@ -14,7 +15,7 @@ def build_institutions_graph(file_lines,
                              metadata,
                              inst_counter,
                              freq: int = None,
-                             year: str = None,
+                             year: int = None,
                              keys_filter: Optional[Set[str]] = None,
                              directed: bool = False):
     """
@@ -24,9 +25,7 @@ def build_institutions_graph(file_lines,
     """
     keys_filter = keys_filter or set()
     filtered_institutions = {x[0] for x in inst_counter.items() if x[1] > freq and x[0]}
-    year_keys: Dict[str, List[str]] = defaultdict(list)
-    for k, d in metadata.items():
-        year_keys[d.get('year')].append(k)
+    year_keys = _year_keys(metadata, year) if year else set()
 
     graph_node_files: Dict[str, Set[str]] = defaultdict(set)
     if directed:
@@ -34,7 +33,7 @@ def build_institutions_graph(file_lines,
     else:
         graph = nx.Graph()
     for file, lines in list(file_lines.items()):
-        if year and file not in year_keys.get(year, {}):
+        if year and file not in year_keys:
             continue
         if keys_filter:
             if file not in keys_filter:
@@ -58,6 +57,15 @@ def build_institutions_graph(file_lines,
     return graph, graph_node_files
 
 
+def _year_keys(metadata, year: int) -> Set[str]:
+    """
+    Keys of metadata (pdf names) of the papers from a given year
+    """
+    if isinstance(metadata, MetadataIndex):
+        return set(metadata.year_pdf_names(year))
+    return {k for k, d in metadata.items() if d.get('year') == year}
+
+
 def graph_to_d3js(graph, file: str) -> None:
     """
     Output graph compatible with D3.js network structure
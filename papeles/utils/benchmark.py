@@ -0,0 +1,183 @@
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Counter as CounterType, Dict, Iterable, List, Optional, Sequence
+
+from papeles.utils import keywords, pdf_parser, text
+
+
+def _tokens(pages: Iterable[List[str]]) -> CounterType[str]:
+    tokens: CounterType[str] = Counter()
+    for page in pages:
+        for line in page:
+            tokens.update(line.split())
+    return tokens
+
+
+def compare_profiles(pdf_paths: Sequence[str],
+                     profiles: Sequence[str] = pdf_parser.PROFILES,
+                     baseline: str = 'full',
+                     local: bool = True) -> Dict[str, Dict[str, float]]:
+    """
+    Compares pdf_parser extraction profiles on a sample of pdf files.
+
+    For each profile it reports
+     - pages_per_sec: pages extracted per second
+     - seconds: total extraction time
+     - missing_tokens: fraction of the baseline tokens that the profile doesn't produce
+     - extra_tokens: tokens produced by the profile that are not in the baseline, as a fraction
+                     of the baseline tokens
+
+    Tokens are whitespace separated and compared as multisets per document, so the token diff
+    ignores the order of lines and columns.
+    """
+    profiles = list(profiles)
+    if baseline not in profiles:
+        profiles.insert(0, baseline)
+    timings: Dict[str, float] = {}
+    pages_count: Dict[str, int] = {}
+    tokens: Dict[str, List[CounterType[str]]] = {}
+    for profile in profiles:
+        timings[profile] = 0.0
+        pages_count[profile] = 0
+        tokens[profile] = []
+        for pdf_path in pdf_paths:
+            start = time.perf_counter()
+            pages = list(pdf_parser.get_text(pdf_path, local, profile=profile))
+            timings[profile] += time.perf_counter() - start
+            pages_count[profile] += len(pages)
+            tokens[profile].append(_tokens(pages))
+
+    report = {}
+    baseline_total = sum(sum(t.values()) for t in tokens[baseline]) or 1
+    for profile in profiles:
+        missing = sum(sum((b - p).values()) for b, p in zip(tokens[baseline], tokens[profile]))
+        extra = sum(sum((p - b).values()) for b, p in zip(tokens[baseline], tokens[profile]))
+        report[profile] = {
+            'seconds': timings[profile],
+            'pages_per_sec': pages_count[profile] / timings[profile] if timings[profile] else 0.0,
+            'missing_tokens': missing / baseline_total,
+            'extra_tokens': extra / baseline_total
+        }
+    return report
+
+
+def compare_tokenization(documents: Sequence[str],
+                         terms_mapping: Optional[Dict[str, str]] = None,
+                         processes: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Compares the previous implementation of text.process_content (see _reference_process_content)
+    against text.process_content one document at a time and text.process_contents, serial and
+    with a pool of processes, e.g. on the abstracts of a NeurIPS year
+
+        metadata = MetadataIndex.from_jsons('output/data_2019/papers_data.jsons')
+        compare_tokenization([paper['abstract'] for paper in metadata.values()])
+
+    The pool has processes workers (the number of cpus by default). For each mode it reports
+    seconds and docs_per_sec, and raises a ValueError if any mode doesn't return the same tokens
+    as the previous implementation. Mappings where a term is contained in another one (see
+    text.TermMapper) are expected to differ.
+    """
+    start = time.perf_counter()
+    expected = [_reference_process_content(document, terms_mapping) for document in documents]
+    report = {'reference': _docs_rate(len(documents), time.perf_counter() - start)}
+    start = time.perf_counter()
+    tokens = [text.process_content(document, terms_mapping) for document in documents]
+    report['process_content'] = _docs_rate(len(documents), time.perf_counter() - start)
+    if tokens != expected:
+        raise ValueError('process_content tokens differ from the reference implementation')
+    pool_processes = processes or os.cpu_count() or 1
+    for mode, mode_processes in (('process_contents', None), ('process_contents_pool',
+                                                              pool_processes)):
+        start = time.perf_counter()
+        tokens = list(text.process_contents(documents, terms_mapping, mode_processes))
+        report[mode] = _docs_rate(len(documents), time.perf_counter() - start)
+        if tokens != expected:
+            raise ValueError(f'{mode} tokens differ from the reference implementation')
+    return report
+
+
+def _reference_process_content(sentence: str,
+                               terms_mapping: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    text.process_content before it was optimized, kept as the baseline for compare_tokenization
+    """
+    if terms_mapping:
+        for term, mapping in terms_mapping.items():
+            sentence = re.sub(rf'\b{term}\b', mapping, sentence, flags=re.I)
+    return list(_reference_remove_stopwords(_reference_clean_text(sentence).split(' ')))
+
+
+def _reference_clean_text(content: str) -> str:
+    if not content:
+        return ''
+    if 'font color' in content or '@' in content:
+        return ''
+    content = content.lower()
+    content = content.replace('<i>', '')
+    content = content.replace('<\\i>', '')
+    content = re.sub(r"[^\w\-\'\s\.]", '', content)
+    content = re.sub(r'\d|\_|\*', '', content)
+    content = re.sub(r'(^|\s+)-(\s+|$)', '', content)
+    content = re.sub(r'\.+', ' ', content)
+    content = re.sub(r'\s+', ' ', content).strip()
+    if content.count("'") > 1:
+        content = re.sub(r'\'', '', content)
+    return content
+
+
+def _reference_remove_stopwords(tokens: Iterable[str]) -> Iterable[str]:
+    stopwords = text._STOPWORDS  # pylint: disable=protected-access
+    yield from [x for x in tokens if x.lower() not in stopwords]
+
+
+def _docs_rate(documents: int, seconds: float) -> Dict[str, float]:
+    return {'seconds': seconds, 'docs_per_sec': documents / seconds if seconds else 0.0}
+
+
+def compare_document_frequencies(text_list: List[List[str]],
+                                 epsilon: float = 0.0001,
+                                 delta: float = 0.01,
+                                 top_doc_keywords: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Compares exact (keywords.DocumentFrequencies) against approximate
+    (keywords.ApproximateDocumentFrequencies) document frequencies for keywords.get_keywords.
+
+    For each mode it reports
+     - seconds: time to count the frequencies and get the keywords of text_list
+     - memory_bytes: size of the frequencies (terms, ids and counts for the exact mode, and the
+                     sketch table for the approximate one)
+     - keywords_overlap: fraction of the exact keyword counts also found by the mode
+    """
+    report = {}
+    exact_keywords: Dict[str, int] = {}
+    for mode in ('exact', 'approximate'):
+        start = time.perf_counter()
+        frequencies: keywords.Frequencies
+        if mode == 'exact':
+            frequencies = keywords.DocumentFrequencies(text_list)
+        else:
+            frequencies = keywords.ApproximateDocumentFrequencies(text_list, epsilon, delta)
+        mode_keywords = frequencies.top_keywords(text_list, top_doc_keywords)
+        seconds = time.perf_counter() - start
+        if mode == 'exact':
+            exact_keywords = mode_keywords
+        overlap = sum(
+            min(count, mode_keywords.get(keyword, 0)) for keyword, count in exact_keywords.items())
+        report[mode] = {
+            'seconds': seconds,
+            'memory_bytes': _frequencies_size(frequencies),
+            'keywords_overlap': overlap / (sum(exact_keywords.values()) or 1)
+        }
+    return report
+
+
+def _frequencies_size(frequencies: keywords.Frequencies) -> int:
+    if isinstance(frequencies, keywords.ApproximateDocumentFrequencies):
+        return frequencies.sketch.table.nbytes
+    vocabulary = frequencies.vocabulary
+    return (sum(sys.getsizeof(term) for term in vocabulary) + sys.getsizeof(vocabulary.terms) +
+            sys.getsizeof(vocabulary.ids) + frequencies.frequencies.nbytes +
+            frequencies.term_counts.nbytes)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, Any, Dict, Iterable, Optional, Set, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class Fetcher:
+    """
+    Downloads remote pdf files using a shared connection pool.
+
+     - bodies are streamed into a spooled buffer that is kept in memory up to max_memory bytes
+       and moves to a temporary file after that.
+     - failed connections and 429/5xx responses are retried with exponential backoff.
+     - if a cache folder is given, bodies are stored there along with their ETag and
+       Last-Modified headers, and following requests are conditional, so unchanged files are
+       never downloaded again.
+    """
+    def __init__(self,
+                 cache_folder: Optional[str] = None,
+                 max_workers: int = 8,
+                 max_memory: int = 16 * 1024**2,
+                 retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 timeout: float = 60.0,
+                 session: Optional[requests.Session] = None):
+        self.cache_folder = cache_folder
+        self.max_workers = max_workers
+        self.max_memory = max_memory
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            retry = Retry(total=retries,
+                          backoff_factor=backoff_factor,
+                          status_forcelist=(429, 500, 502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=max_workers,
+                                  pool_maxsize=max_workers,
+                                  max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        if cache_folder:
+            os.makedirs(cache_folder, exist_ok=True)
+
+    def _cache_paths(self, url: str) -> Tuple[str, str]:
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        folder = self.cache_folder or ''
+        return os.path.join(folder, f'{name}.pdf'), os.path.join(folder, f'{name}.json')
+
+    def _validators(self, url: str) -> Dict[str, str]:
+        """
+        Conditional request headers for url, based on the last response stored in the cache
+        """
+        if not self.cache_folder:
+            return {}
+        body_path, headers_path = self._cache_paths(url)
+        if not os.path.exists(body_path) or not os.path.exists(headers_path):
+            return {}
+        with open(headers_path, 'r') as f:
+            cached = json.load(f)
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def fetch(self, url: str) -> IO[bytes]:
+        """
+        Downloads url and returns a binary file object positioned at the start of the body
+        """
+        with self.session.get(url, headers=self._validators(url), stream=True,
+                              timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return open(self._cache_paths(url)[0], 'rb')
+            response.raise_for_status()
+            if self.cache_folder:
+                return self._store(url, response)
+            buffer: IO[bytes] = tempfile.SpooledTemporaryFile(max_size=self.max_memory)
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                buffer.write(chunk)
+        buffer.seek(0)
+        return buffer
+
+    def _store(self, url: str, response: requests.Response) -> IO[bytes]:
+        """
+        Streams the body into the cache folder, replacing the files only once fully downloaded
+        """
+        body_path, headers_path = self._cache_paths(url)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(tmp_path, body_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        validators = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_folder, suffix='.part')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(validators, f)
+        os.replace(tmp_path, headers_path)
+        return open(body_path, 'rb')
+
+    def fetch_many(self, urls: Iterable[str]) -> Iterable[Tuple[str, Any]]:
+        """
+        Downloads several urls concurrently, with at most max_workers requests in flight.
+
+        Returns tuples with (url, file object or the exception raised while fetching it) as soon as
+        each download finishes.
+        """
+        urls_iter = iter(urls)
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            in_flight: Dict[Future, str] = {}
+            while True:
+                while len(in_flight) < self.max_workers:
+                    url = next(urls_iter, None)
+                    if url is None:
+                        break
+                    in_flight[executor.submit(self.fetch, url)] = url
+                if not in_flight:
+                    return
+                done: Set[Future]
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    error = future.exception()
+                    yield url, error if error is not None else future.result()
+
+
+_default_fetcher: Optional[Fetcher] = None
+
+
+def get_fetcher() -> Fetcher:
+    """
+    Fetcher shared by every remote pdf_parser.get_document call in this process without a
+    fetcher of its own (see configure_fetcher)
+    """
+    global _default_fetcher  # pylint: disable=global-statement
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher()
+    return _default_fetcher
+
+
+def configure_fetcher(**options: Any) -> Fetcher:
+    """
+    Replaces the shared fetcher (see get_fetcher) with a new Fetcher(**options), e.g.
+
+        configure_fetcher(cache_folder='output/pdf_cache', max_workers=16)
+
+    Worker processes forked afterwards (e.g. pdf_batch.get_texts) share the same configuration.
+    """
+    global _default_fetcher  # pylint: disable=global-statement
+    _default_fetcher = Fetcher(**options)
+    return _default_fetcher
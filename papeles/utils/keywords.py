@@ -1,9 +1,26 @@
+import itertools
 import math
+import pickle
+import tempfile
+from array import array
 from collections import Counter
-from typing import Counter as CounterType, Dict, List
+from multiprocessing import Pool
+from typing import (IO, Callable, Counter as CounterType, Dict, Hashable, Iterable, Iterator, List,
+                    Mapping, Optional, Tuple, Union)
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from papeles.utils.sketch import CountMinSketch
+from papeles.utils.vocabulary import Vocabulary, as_ids
 
 # TODO: consider replacing these methods with Gensim
 
+# terms counted at once by ApproximateDocumentFrequencies
+_SKETCH_BATCH_SIZE = 100000
+
+Frequencies = Union['DocumentFrequencies', 'ApproximateDocumentFrequencies']
+
 
 def count_word(word: str, word_list: List[str]) -> int:
     """
@@ -42,15 +59,303 @@ def tfidf(word: str, text: List[str], text_list: List[List[str]]) -> float:
     return tf(word, text) * idf(word, text_list)
 
 
-def get_keywords(text_list: List[List[str]], top_doc_keywords: int = 20) -> Dict[str, int]:
+def get_keywords(text_list: List[List[str]],
+                 top_doc_keywords: int = 20,
+                 frequencies: Optional[Frequencies] = None) -> Dict[str, int]:
     """
     Only using top 20 (default) keywords per document, ranked by TF-IDF.
 
     Note that text in text_list is a list of words.
+
+    Scores are computed in bulk from a sparse matrix of term counts by document (see tfidf for
+    the formula), and ties are ranked by the first occurrence of the word in the document.
+    IDF is computed over text_list, unless document frequencies from another collection of
+    documents are given (e.g. a whole year, see DocumentFrequencies), or approximated for
+    corpora too large to keep every term in memory (see ApproximateDocumentFrequencies).
+    """
+    vocabulary = Vocabulary()
+    documents = vocabulary.encode_many(text_list)
+    counts, first_positions = term_count_matrix(documents, len(vocabulary))
+    if frequencies is None:
+        idf_values = _idf_values(len(documents),
+                                 np.bincount(counts.indices, minlength=len(vocabulary)))
+    else:
+        idf_values = frequencies.idf(vocabulary.terms)
+    top_terms = _top_terms(counts, first_positions, idf_values, top_doc_keywords)
+    return dict(Counter(vocabulary.decode(top_terms)))
+
+
+def get_keywords_streaming(source: Union[Iterable[List[str]], Callable[[], Iterable[List[str]]]],
+                           top_doc_keywords: int = 20,
+                           chunk_size: int = 10000) -> Dict[str, int]:
+    """
+    get_keywords for corpora that don't fit in memory, reading the documents twice: first to
+    count document frequencies, and then to get the top keywords of each document, chunk_size
+    documents at a time. Memory is bounded by the vocabulary instead of the corpus.
+
+    source can be anything that can be iterated more than once, or a function returning a new
+    iterable of documents each time it's called, e.g. the n-grams of the abstracts in a packed
+    corpus (see papeles.corpus.packed)
+
+        get_keywords_streaming(lambda: (
+            text.generate_ngram_text(' '.join(packed.get_field(key, 'abstract')), 2)
+            for key in packed))
+
+    A single use iterator (e.g. a generator) is written to a temporary file while counting
+    document frequencies, and read back from there. The result is the same as get_keywords.
+    """
+    spill = None
+    documents: Iterable[List[str]]
+    if not callable(source) and iter(source) is source:
+        spill = tempfile.TemporaryFile()
+        documents = _spill_documents(source, spill)
+    else:
+        documents = source() if callable(source) else source
+    try:
+        frequencies = DocumentFrequencies()
+        for chunk in _chunks(documents, chunk_size):
+            frequencies.update(chunk)
+        if spill is not None:
+            spill.seek(0)
+            documents = _read_documents(spill)
+        else:
+            documents = source() if callable(source) else source
+        keywords_counter: CounterType[str] = Counter()
+        for chunk in _chunks(documents, chunk_size):
+            keywords_counter.update(get_keywords(chunk, top_doc_keywords, frequencies))
+        return dict(keywords_counter)
+    finally:
+        if spill is not None:
+            spill.close()
+
+
+def _chunks(documents: Iterable[List[str]], chunk_size: int) -> Iterator[List[List[str]]]:
+    iterator = iter(documents)
+    chunk = list(itertools.islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, chunk_size))
+
+
+def _spill_documents(documents: Iterable[List[str]], f: IO[bytes]) -> Iterator[List[str]]:
+    for document in documents:
+        pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+        yield document
+
+
+def _read_documents(f: IO[bytes]) -> Iterator[List[str]]:
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
+
+
+def get_partitions_keywords(partitions: Mapping[Hashable, List[List[str]]],
+                            top_doc_keywords: int = 20,
+                            processes: Optional[int] = None) -> Dict[Hashable, Dict[str, int]]:
+    """
+    get_keywords for each partition of a corpus (computing IDF over the partition documents),
+    in a pool of processes, e.g. by year and n-gram order
+
+        get_partitions_keywords({(year, n): text_lists[n][year] for year in years for n in (2, 3)})
+
+    Each task only sends the documents of its partition to a worker, and the largest partitions
+    are scheduled first. Returns the keywords by partition, same as calling get_keywords on
+    each one of them.
+    """
+    schedule = sorted(partitions,
+                      key=lambda key: sum(len(text) for text in partitions[key]),
+                      reverse=True)
+    results = {}
+    with Pool(processes) as pool:
+        tasks = ((key, partitions[key], top_doc_keywords) for key in schedule)
+        for key, keywords_counter in pool.imap_unordered(_partition_keywords, tasks):
+            results[key] = keywords_counter
+    return {key: results[key] for key in partitions}
+
+
+def _partition_keywords(
+        task: Tuple[Hashable, List[List[str]], int]) -> Tuple[Hashable, Dict[str, int]]:
+    key, text_list, top_doc_keywords = task
+    return key, get_keywords(text_list, top_doc_keywords)
+
+
+class DocumentFrequencies:
+    """
+    Number of documents containing each term (and total count of each term) over a collection
+    of documents, that can be updated with new documents, merged with the frequencies of other
+    partitions (e.g. years) and saved (pickle), so IDF doesn't need to be recomputed from
+    scratch when documents are added, e.g.
+
+        frequencies = DocumentFrequencies.load('frequencies_2019.pkl')
+        frequencies.update(new_text_list)
+        frequencies.top_keywords(new_text_list)
     """
-    keywords_counter: CounterType[str] = Counter()
-    for text in text_list:
-        scores = {word: tfidf(word, text, text_list) for word in text}
-        sorted_words = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        keywords_counter.update([x[0] for x in sorted_words[:top_doc_keywords]])
-    return dict(keywords_counter)
+    def __init__(self, text_list: Iterable[List[str]] = ()):
+        self.vocabulary = Vocabulary()
+        self.documents = 0
+        self.frequencies = np.zeros(0, dtype=np.int64)
+        self.term_counts = np.zeros(0, dtype=np.int64)
+        self.update(text_list)
+
+    def update(self, text_list: Iterable[List[str]]) -> None:
+        counts, _ = term_count_matrix(self.vocabulary.encode_many(text_list), len(self.vocabulary))
+        self._resize()
+        self.documents += counts.shape[0]
+        self.frequencies += np.bincount(counts.indices, minlength=counts.shape[1])
+        self.term_counts += np.asarray(counts.sum(axis=0)).ravel()
+
+    def merge(self, other: 'DocumentFrequencies') -> None:
+        """
+        Adds the documents counted by other (e.g. another year)
+        """
+        term_ids = np.array([self.vocabulary.add(term) for term in other.vocabulary],
+                            dtype=np.int64)
+        self._resize()
+        self.documents += other.documents
+        self.frequencies[term_ids] += other.frequencies
+        self.term_counts[term_ids] += other.term_counts
+
+    def idf(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Inverse document frequency of each term (see idf), where terms never counted are found
+        in no document
+        """
+        term_ids = np.array([self.vocabulary.ids.get(term, -1) for term in terms], dtype=np.int64)
+        return _idf_values(self.documents, np.append(self.frequencies, 0)[term_ids])
+
+    def top_keywords(self,
+                     text_list: List[List[str]],
+                     top_doc_keywords: int = 20) -> Dict[str, int]:
+        """
+        Top keywords of text_list (see get_keywords) using these document frequencies
+        """
+        return get_keywords(text_list, top_doc_keywords, self)
+
+    def _resize(self) -> None:
+        """
+        Grows the frequencies to the size of the vocabulary, with 0 for new terms
+        """
+        missing = len(self.vocabulary) - len(self.frequencies)
+        if missing:
+            self.frequencies = np.concatenate((self.frequencies, np.zeros(missing, np.int64)))
+            self.term_counts = np.concatenate((self.term_counts, np.zeros(missing, np.int64)))
+
+    def save(self, path: str) -> None:
+        self._resize()
+        with open(path, 'wb') as f:
+            pickle.dump((self.vocabulary.terms, self.documents, self.frequencies, self.term_counts),
+                        f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'DocumentFrequencies':
+        frequencies = cls()
+        with open(path, 'rb') as f:
+            terms, documents, document_frequencies, term_counts = pickle.load(f)
+        frequencies.vocabulary = Vocabulary(terms)
+        frequencies.documents = documents
+        frequencies.frequencies = document_frequencies
+        frequencies.term_counts = term_counts
+        return frequencies
+
+
+def term_count_matrix(documents: List[array], n_terms: int) -> Tuple[csr_matrix, np.ndarray]:
+    """
+    Sparse matrix with the count of each term by document (see vocabulary.Vocabulary.encode),
+    and the position of the first occurrence of each stored term within the corpus, aligned
+    with the matrix data.
+    """
+    lengths = np.array([len(document) for document in documents], dtype=np.int64)
+    if not lengths.sum():
+        return csr_matrix((len(documents), n_terms), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    rows = np.repeat(np.arange(len(documents), dtype=np.int64), lengths)
+    term_ids = np.concatenate([as_ids(document) for document in documents]).astype(np.int64)
+    keys, first_positions, term_counts = np.unique(rows * n_terms + term_ids,
+                                                   return_index=True,
+                                                   return_counts=True)
+    rows, term_ids = np.divmod(keys, n_terms)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(documents)))))
+    return csr_matrix((term_counts, term_ids, indptr),
+                      shape=(len(documents), n_terms)), first_positions
+
+
+def _idf_values(documents: int, frequencies: np.ndarray) -> np.ndarray:
+    """
+    Inverse document frequency (see idf) for each document frequency, using math.log so the
+    values are exactly the same as idf. IDF is undefined without documents, so frequencies
+    with no document counted (e.g. an empty DocumentFrequencies) raise a ValueError.
+    """
+    if not documents and len(frequencies):
+        raise ValueError('document frequencies have no documents, update them before using idf')
+    return np.array([math.log(documents / (1 + df)) for df in frequencies.tolist()])
+
+
+def _top_terms(counts: csr_matrix, first_positions: np.ndarray, idf_values: np.ndarray,
+               top_doc_keywords: int) -> np.ndarray:
+    """
+    Term ids of the top TF-IDF terms of each document, in document order and by rank
+    """
+    lengths = np.asarray(counts.sum(axis=1)).ravel()
+    rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+    scores = counts.data / lengths[rows] * idf_values[counts.indices]
+    # a single sort of all the scores, instead of a partial selection per document: documents
+    # are short (e.g. abstracts), so a loop over rows costs more than sorting their few terms
+    order = np.lexsort((first_positions, -scores, rows))
+    ranks = np.arange(len(order)) - counts.indptr[rows]
+    return counts.indices[order[ranks < top_doc_keywords]]
+
+
+class ApproximateDocumentFrequencies:
+    """
+    Same as DocumentFrequencies, but the number of documents containing each term is counted in
+    a CountMinSketch, so memory stays fixed no matter how large the vocabulary is (e.g. full
+    text 3-grams across venues).
+
+    Document frequencies can only be overestimated (by at most epsilon times the number of
+    distinct terms of all documents, with probability 1 - delta), so IDF can only be lower.
+    """
+    def __init__(self,
+                 text_list: Iterable[List[str]] = (),
+                 epsilon: float = 0.0001,
+                 delta: float = 0.01):
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.documents = 0
+        self.update(text_list)
+
+    def update(self, text_list: Iterable[List[str]]) -> None:
+        terms: List[str] = []
+        for text in text_list:
+            self.documents += 1
+            terms.extend(set(text))
+            if len(terms) >= _SKETCH_BATCH_SIZE:
+                self.sketch.update(terms)
+                terms = []
+        self.sketch.update(terms)
+
+    def merge(self, other: 'ApproximateDocumentFrequencies') -> None:
+        self.sketch.merge(other.sketch)
+        self.documents += other.documents
+
+    def idf(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Approximate inverse document frequency of each term (see idf)
+        """
+        return _idf_values(self.documents, self.sketch.query(terms))
+
+    def top_keywords(self,
+                     text_list: List[List[str]],
+                     top_doc_keywords: int = 20) -> Dict[str, int]:
+        return get_keywords(text_list, top_doc_keywords, self)
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            pickle.dump((self.documents, self.sketch), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'ApproximateDocumentFrequencies':
+        frequencies = cls()
+        with open(path, 'rb') as f:
+            frequencies.documents, frequencies.sketch = pickle.load(f)
+        return frequencies
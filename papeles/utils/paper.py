@@ -1,8 +1,39 @@
-from typing import Iterable, List
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional
 
 from papeles.types import ACM_TYPE
 from papeles.utils.text import keep_word
 
+# a sentence is anything up to (and including) a stop
+_SENTENCE_RE = re.compile(r'[^.!?]*[.!?]')
+
+# reference entries start with [n] or n. followed by text (so a wrapped "2016." is not one)
+_REFERENCE_MARKER_RE = re.compile(r'^(?:\[\d+\]\s*|\d{1,3}\.\s+(?=\S))')
+# parts of a reference are separated by a period, unless it follows an initial
+_REFERENCE_PART_RE = re.compile(r'(?<!\b[A-Z])\.\s+')
+_AUTHORS_SEPARATOR_RE = re.compile(r'\s*,\s*(?:and\s+)?|\s+and\s+')
+_YEAR_RE = re.compile(r'\b(?:19|20)\d\d\b')
+# surname first authors, e.g. "Kingma, D. P. and Ba, J." or "van der Maaten, L., et al."
+_SURNAME = r"\b(?:(?!and\s)[a-z]+\s)*[A-Z][\w'\-]+(?:[\s\-][A-Z][\w'\-]+)*"
+_INITIALS = r'[A-Z]\.(?:[\s\-]?[A-Z]\.)*'
+_SURNAME_FIRST_AUTHOR_RE = re.compile(rf'({_SURNAME}),\s+({_INITIALS})')
+_SURNAME_FIRST_AUTHORS_RE = re.compile(
+    rf'{_SURNAME},\s+{_INITIALS}'
+    rf'(?:(?:\s*,\s*(?:and\s+|&\s+)?|\s+(?:and|&)\s+){_SURNAME},\s+{_INITIALS})*'
+    r'(?:,?\s+et\s+al\.)?')
+# first author of an unnumbered entry, e.g. "Kingma, D. P. and..." or "A. Krizhevsky, I. ..."
+_REFERENCE_START_RE = re.compile(
+    rf'^(?:{_SURNAME},\s+{_INITIALS}|{_INITIALS}\s+{_SURNAME}(?:,|\s+and\s))')
+# year right after the authors, e.g. "Kingma, D. P. and Ba, J. (2015). Adam: ..."
+_LEADING_YEAR_RE = re.compile(r'^[\s.,]*\(?(?:19|20)\d\d[a-z]?\)?[.,:]?\s*')
+# headings of the sections that can follow the references, e.g. "Appendix", "A Proofs" or
+# "A.1 Proof of Theorem 1"
+_APPENDIX_RE = re.compile(r'^(?:appendix|appendices|supplementary)\b', flags=re.I)
+_SECTION_HEADING_RE = re.compile(r'^(?:\d{1,2}|[A-Z])(?:\s+[A-Z][a-z]+(?:\s+[a-z][\w\-]*)*|'
+                                 r'(?:\.\d+)+\s+[A-Z].*)$')
+# last line of a reference entry, ending with its year or with a period after the year
+_REFERENCE_END_RE = re.compile(r'\b(?:19|20)\d\d(?:[a-z]?\)?$|\b.*\.$)')
+
 
 def flatten(paper: List[List[str]]) -> Iterable[str]:
     """
@@ -13,6 +44,123 @@ def flatten(paper: List[List[str]]) -> Iterable[str]:
             yield line
 
 
+class Sections(NamedTuple):
+    header: List[str]
+    abstract: List[str]
+    sentences: List[str]
+    references: List[str]
+
+
+SECTIONS = Sections._fields
+
+
+class SectionSegmenter:
+    """
+    Splits the lines of a paper into its sections in a single pass, fed one line at a time:
+
+     - header: anything before the first "abstract"
+     - abstract: anything between "abstract" and the abstract stop (see _verify_abstract_stop)
+     - sentences: anything between "introduction" and the references or acknowledgments
+     - references: lines after "references"
+
+    Abstract and sentences follow the rules in get_abstract_sentences and get_sentences.
+    Only the requested sections are collected, and done is True once none of them can change.
+    """
+    def __init__(self, document_type: str = None, sections: Iterable[str] = SECTIONS):
+        self.document_type = document_type
+        self.sections = set(sections)
+        self.header: List[str] = []
+        self.abstract = _SentenceBuilder()
+        self.body = _SentenceBuilder()
+        self.references: List[str] = []
+        # sections the current line belongs to (see SECTIONS)
+        self._open = {'header'}
+
+    @property
+    def done(self) -> bool:
+        return 'header' not in self._open and self.sections == {'header'}
+
+    def feed(self, line: str) -> None:
+        s = line.strip()
+        s_lower = s.lower()
+        tokens = s.split(' ')
+        self._feed_header(s, s_lower)
+        self._feed_abstract(s, s_lower)
+        self._feed_references(s, s_lower)
+        if s_lower in ('references', 'acknowledgments'):
+            self._open.discard('sentences')
+        if tokens[-1].lower() == 'introduction':
+            self._open.add('sentences')
+            return
+        # a single word is never part of the abstract or the sentences (e.g. "abstract")
+        collected = self._open & self.sections & {'abstract', 'sentences'}
+        if len(tokens) > 1 and collected:
+            words = list(filter(keep_word, tokens))
+            if 'abstract' in collected:
+                self.abstract.extend(words)
+            if 'sentences' in collected:
+                self.body.extend(words)
+
+    def _feed_header(self, s: str, s_lower: str) -> None:
+        if s_lower == 'abstract':
+            self._open.discard('header')
+        elif 'header' in self._open and 'header' in self.sections:
+            self.header.append(s)
+
+    def _feed_abstract(self, s: str, s_lower: str) -> None:
+        if s_lower == 'abstract':
+            self._open.add('abstract')
+        elif _verify_abstract_stop(s, self.document_type):
+            self._open.discard('abstract')
+
+    def _feed_references(self, s: str, s_lower: str) -> None:
+        if 'references' not in self._open:
+            if s_lower == 'references':
+                self._open.add('references')
+        elif _is_references_end(s, self.references[-1] if self.references else ''):
+            self._open.discard('references')
+        elif s and 'references' in self.sections:
+            self.references.append(s)
+
+    def result(self) -> Sections:
+        return Sections(self.header, self.abstract.sentences, self.body.sentences, self.references)
+
+
+def segment(lines: Iterable[str],
+            document_type: str = None,
+            sections: Iterable[str] = SECTIONS) -> Sections:
+    """
+    Splits the lines of a paper into header, abstract, sentences and references in a single
+    pass (see SectionSegmenter). Sections not requested are returned empty.
+    """
+    segmenter = SectionSegmenter(document_type, sections)
+    for line in lines:
+        segmenter.feed(line)
+        if segmenter.done:
+            break
+    return segmenter.result()
+
+
+def iter_sentences(pages: Iterable[List[str]]) -> Iterator[str]:
+    """
+    Streaming version of get_sentences, receiving the pages of a paper (paragraph -> lines)
+    as pdf_parser.get_text yields them, e.g.
+
+        for sentence in iter_sentences(pdf_parser.get_text(pdf_path, local=True)):
+            ...
+
+    Each sentence is yielded as soon as its stop is seen, so only the current page is kept in
+    memory and sentences can be processed while the rest of the pdf is being parsed.
+    """
+    segmenter = SectionSegmenter(sections=('sentences', ))
+    for page in pages:
+        for line in page:
+            segmenter.feed(line)
+            if segmenter.body.sentences:
+                yield from segmenter.body.sentences
+                segmenter.body.sentences.clear()
+
+
 def get_sentences(sentences: List[str]) -> List[str]:
     """
     Given the nature of the input is very messy and unreliable (from PDF parser),
@@ -26,47 +174,15 @@ def get_sentences(sentences: List[str]) -> List[str]:
     5. exclude anything before the abstract
     6. exclude anything after the references or acknowledgements
     7. skip sentences with length 1
-
-    FIXME: Improve speed of this method as it's painfully slow at this moment.
-    """
-    include = False
-    full_paper = []
-    for s in sentences:
-        s = s.strip()
-        if s.lower() == 'introduction' or s.split(' ')[-1].lower() == 'introduction':
-            include = True
-            continue
-        if s.lower() == 'references' or s.lower() == 'acknowledgments':
-            include = False
-        if len(s.split(' ')) == 1:
-            continue
-        if include:
-            for t in s.split(' '):
-                if keep_word(t):
-                    full_paper.append(t)
-    sentences = []
-    s = ''
-    for c in ' '.join(full_paper):
-        if c not in '.!?':
-            s += c
-        else:
-            s += c
-            sentences.append(s.strip())
-            s = ''
-    return sentences
+    """
+    return segment(sentences, sections=('sentences', )).sentences
 
 
 def get_header(sentences: List[str]) -> List[str]:
     """
     Header is defined as anything that comes before the abstract
     """
-    header = []
-    for s in sentences:
-        s = s.strip()
-        if s.lower() == 'abstract':
-            break
-        header.append(s)
-    return header
+    return segment(sentences, sections=('header', )).header
 
 
 def get_abstract_sentences(sentences: List[str], document_type: str = None) -> List[str]:
@@ -87,29 +203,121 @@ def get_abstract_sentences(sentences: List[str], document_type: str = None) -> L
                     be a better rule for this (e.g. ACM)
     7. skip sentences with length 1
     """
-    abstract = []
-    include = False
-    for s in sentences:
-        s = s.strip()
-        if s.lower() == 'abstract':
-            include = True
-            continue
-        if _verify_abstract_stop(s, document_type):  # TODO: refactor
-            include = False
-        if len(s.split(' ')) == 1:
-            continue
-        if include:
-            for t in s.split(' '):
-                if keep_word(t):
-                    abstract.append(t)
-    return _build_sentences(abstract)
-
-
-# def get_references(sentences: List[str]) -> List[str]:
-#     """
-#     TODO:
-#      - get references structure (title, authors, etc.)
-#     """
+    return segment(sentences, document_type, sections=('abstract', )).abstract
+
+
+class Reference(NamedTuple):
+    authors: List[str]
+    title: str
+    year: Optional[int]
+    venue: str
+    raw: str
+
+
+def get_references(sentences: List[str]) -> List[Reference]:
+    """
+    Extract the references of a paper (anything after "references" up to the next section
+    heading, see segment) and parse each entry into authors, title, year and venue.
+
+    Entries are expected to start with "[n]" or "n.", and the following lines are joined to
+    the current entry. Without numbered entries, a new entry starts after each line ending
+    with a period, or at a line starting with an author (e.g. "Kingma, D. P. and" or
+    "A. Krizhevsky, I.") unless the previous line ends in the middle of the authors. As with
+    the rest of the paper, the parsing is a best effort (see parse_reference).
+    """
+    lines = segment(sentences, sections=('references', )).references
+    numbered = any(_REFERENCE_MARKER_RE.match(line) for line in lines)
+    entries: List[str] = []
+    for line in lines:
+        marker = _REFERENCE_MARKER_RE.match(line)
+        if marker or not entries or (not numbered and _starts_reference(entries[-1], line)):
+            entries.append(line[marker.end():] if marker else line)
+        elif entries[-1].endswith('-'):
+            entries[-1] = entries[-1][:-1] + line
+        else:
+            entries[-1] = f'{entries[-1]} {line}'
+    return [parse_reference(entry) for entry in entries]
+
+
+def _starts_reference(previous: str, line: str) -> bool:
+    if previous.endswith('.'):
+        return True
+    continued = previous.endswith((',', '-', '&')) or previous.split(' ')[-1] == 'and'
+    return not continued and bool(_REFERENCE_START_RE.match(line))
+
+
+def parse_reference(entry: str) -> Reference:
+    """
+    Parses a single reference entry, e.g.
+
+        A. Krizhevsky, I. Sutskever, and G. E. Hinton. Imagenet classification with deep
+        convolutional neural networks. In NIPS, 2012.
+
+    Authors are anything before the first period not following an initial, the title is
+    the next part, and anything left is the venue (without the year). Authors written surname
+    first (e.g. "Kingma, D. P. and Ba, J. Adam: A method...") are recognized by their initials
+    instead, optionally followed by the year, and returned as "D. P. Kingma".
+    """
+    entry = entry.strip()
+    surname_first = _SURNAME_FIRST_AUTHORS_RE.match(entry)
+    if surname_first:
+        authors = [
+            f'{initials} {surname}'
+            for surname, initials in _SURNAME_FIRST_AUTHOR_RE.findall(surname_first.group())
+        ]
+        parts = _REFERENCE_PART_RE.split(_LEADING_YEAR_RE.sub('', entry[surname_first.end():]),
+                                         maxsplit=1)
+        title = parts[0]
+        venue = parts[1] if len(parts) > 1 else ''
+    else:
+        parts = _REFERENCE_PART_RE.split(entry, maxsplit=2)
+        authors = [a for a in _AUTHORS_SEPARATOR_RE.split(parts[0])
+                   if a and a != 'et al'] if len(parts) > 1 else []
+        title = parts[1] if len(parts) > 1 else parts[0]
+        venue = parts[2] if len(parts) > 2 else ''
+    years = _YEAR_RE.findall(entry)
+    if years:
+        venue = venue.replace(years[-1], '')
+    if venue.startswith('In '):
+        venue = venue[3:]
+    return Reference(authors=authors,
+                     title=title.strip(' .'),
+                     year=int(years[-1]) if years else None,
+                     venue=' '.join(venue.split()).strip(' ,.'),
+                     raw=entry)
+
+
+def is_header_end(line: str) -> bool:
+    """
+    Line where the header ends (see get_header).
+
+    Can be used as pdf_parser.get_text stop predicate, so only the pages needed are parsed.
+    """
+    return line.strip().lower() == 'abstract'
+
+
+def is_abstract_end(line: str, document_type: str = None) -> bool:
+    """
+    Line where the abstract ends (see get_abstract_sentences).
+
+    Can be used as pdf_parser.get_text stop predicate, so only the pages needed are parsed.
+    For other document types use functools.partial(is_abstract_end, document_type=...)
+    """
+    return _verify_abstract_stop(line.strip(), document_type)
+
+
+def _is_references_end(line: str, previous: str) -> bool:
+    """
+    Heading of a section after the references, e.g. "Appendix", "A Proofs" or "7 Conclusion",
+    only found after the last line of an entry (see _REFERENCE_END_RE), so a title continued in
+    the next line (e.g. "A Bayesian approach to model selection") doesn't end the references
+    """
+    if not _REFERENCE_END_RE.search(previous):
+        return False
+    if _APPENDIX_RE.match(line):
+        return True
+    return (len(line.split(' ')) <= 6 and not line.endswith('.') and ',' not in line
+            and bool(_SECTION_HEADING_RE.match(line)))
 
 
 def _verify_abstract_stop(sentence: str, document_type: str = None) -> bool:
@@ -120,14 +328,27 @@ def _verify_abstract_stop(sentence: str, document_type: str = None) -> bool:
     return main_rule
 
 
-def _build_sentences(lines: List[str]) -> List[str]:
-    sentences = []
-    s = ''
-    for c in ' '.join(lines):
-        if c not in '.!?':
-            s += c
+class _SentenceBuilder:
+    """
+    Joins words and splits them after each stop (.!?), dropping anything after the last stop.
+
+    Sentences are built as soon as their stop is added, and only the words after the last stop
+    are kept.
+    """
+    def __init__(self):
+        self.sentences: List[str] = []
+        self._tail = ''
+        self._empty = True
+
+    def extend(self, words: List[str]) -> None:
+        if not words:
+            return
+        text = ' '.join(words)
+        if self._empty:
+            self._empty = False
         else:
-            s += c
-            sentences.append(s.strip())
-            s = ''
-    return sentences
+            text = f'{self._tail} {text}'
+        end = max(text.rfind('.'), text.rfind('!'), text.rfind('?')) + 1
+        if end:
+            self.sentences.extend(s.strip() for s in _SENTENCE_RE.findall(text, 0, end))
+        self._tail = text[end:]
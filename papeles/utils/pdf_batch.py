@@ -0,0 +1,272 @@
+import json
+import os
+import resource
+import signal
+import time
+from collections import deque
+from multiprocessing.pool import AsyncResult, Pool
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from papeles.utils import pdf_parser
+
+
+class Limits(NamedTuple):
+    """
+    Resource limits for each document extracted in a worker process:
+     - document_timeout: seconds to extract the whole document
+     - page_timeout: seconds to extract a single page
+     - memory_limit: bytes of address space for each worker process
+    """
+    document_timeout: Optional[float] = None
+    page_timeout: Optional[float] = None
+    memory_limit: Optional[int] = None
+
+
+class ExtractionError(Exception):
+    def __init__(self, pdf_path: str, reason: str, detail: str):
+        super().__init__(f'{pdf_path}: {reason} ({detail})')
+        self.pdf_path = pdf_path
+        self.reason = reason
+        self.detail = detail
+
+
+class Quarantine:
+    """
+    Report of the documents that could not be extracted, with the reason why
+    (document_timeout, page_timeout, memory or error).
+
+    If a path is given, the report is stored there as a json lines file so documents already
+    quarantined are skipped in following runs instead of keeping a hand-made list of files.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.records: Dict[str, Dict[str, str]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.records[record['pdf_path']] = record
+
+    def add(self, pdf_path: str, reason: str, detail: str) -> None:
+        record = {'pdf_path': pdf_path, 'reason': reason, 'detail': detail}
+        self.records[pdf_path] = record
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def __contains__(self, pdf_path: object) -> bool:
+        return pdf_path in self.records
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(self.records.values())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class _Timeout(BaseException):
+    """
+    Not an Exception, so it can't be swallowed by the "except Exception" blocks in pdfminer
+    """
+
+
+# the alarm only raises while a page is being extracted, a late alarm is ignored
+_ALARM = {'armed': False}
+
+
+def _raise_timeout(_signum, _frame):
+    if _ALARM['armed']:
+        _ALARM['armed'] = False
+        raise _Timeout()
+
+
+# (index, pdf path, local, limits, get_text options) and (index, pages, failure)
+_Task = Tuple[int, str, bool, Limits, Dict[str, Any]]
+_Result = Tuple[int, Optional[List[List[str]]], Optional[Tuple[str, str]]]
+
+# seconds the parent waits for a document after its document_timeout, before giving up on it
+_DEADLINE_SLACK = 5.0
+# seconds between checks for finished documents in the parent
+_POLL_INTERVAL = 0.01
+
+
+def _init_worker(memory_limit: Optional[int]) -> None:
+    if memory_limit:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+
+
+def _document_size(pdf_path: str, local: bool) -> int:
+    """
+    Size in bytes of a local document, used to schedule the largest documents first
+    """
+    if not local:
+        return 0
+    try:
+        return os.path.getsize(pdf_path)
+    except OSError:
+        return 0
+
+
+def _time_budget(start: float, limits: Limits) -> float:
+    """
+    Seconds left to extract the next page (0 means no limit)
+    """
+    budgets = []
+    if limits.document_timeout:
+        budgets.append(max(start + limits.document_timeout - time.monotonic(), 1e-3))
+    if limits.page_timeout:
+        budgets.append(limits.page_timeout)
+    return min(budgets) if budgets else 0
+
+
+def _extract_document(task: _Task) -> _Result:
+    """
+    Worker entry point: fully extracts a document so it can be sent back to the parent process.
+
+    Time limits are enforced with SIGALRM before each page is interpreted, so a pathological page
+    can't hang the worker. Any failure is returned as (reason, detail) instead of raised.
+    """
+    index, pdf_path, local, limits, text_options = task
+    timed = bool(limits.document_timeout or limits.page_timeout)
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout) if timed else None
+    start = time.monotonic()
+    pages: List[List[str]] = []
+    try:
+        pages_iter = iter(pdf_parser.get_text(pdf_path, local, **text_options))
+        while True:
+            if timed:
+                _ALARM['armed'] = True
+                signal.setitimer(signal.ITIMER_REAL, _time_budget(start, limits))
+            try:
+                page = next(pages_iter, None)
+            finally:
+                if timed:
+                    _ALARM['armed'] = False
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            if page is None:
+                break
+            pages.append(page)
+    except _Timeout:
+        elapsed = time.monotonic() - start
+        if limits.document_timeout and elapsed >= limits.document_timeout:
+            return index, None, ('document_timeout', f'{elapsed:.1f}s at page {len(pages) + 1}')
+        return index, None, ('page_timeout', f'page {len(pages) + 1}')
+    except MemoryError:
+        return index, None, ('memory', f'page {len(pages) + 1}')
+    except Exception as e:  # pylint: disable=broad-except
+        return index, None, ('error', repr(e))
+    finally:
+        if timed:
+            _ALARM['armed'] = False
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return index, pages, None
+
+
+def get_texts(pdf_paths: List[str],
+              local: bool = True,
+              processes: Optional[int] = None,
+              ordered: bool = True,
+              limits: Optional[Limits] = None,
+              quarantine: Optional[Quarantine] = None,
+              **text_options: Any) -> Iterable[Tuple[str, List[List[str]]]]:
+    """
+    Extracts the text of several pdf files using a pool of processes, returning tuples with
+    (pdf path, pages) where pages is the list of lines per page as yielded by pdf_parser.get_text.
+
+    Documents are scheduled from largest to smallest so a single huge file doesn't finish last.
+    If ordered is True, results are returned in the same order as pdf_paths, otherwise they are
+    returned as soon as each document finishes.
+
+    Each document is extracted within the given limits (see Limits), and with a document_timeout
+    the parent process also stops waiting for a worker that never returns (e.g. it was killed
+    or is stuck in C code), so a single document can't block the batch. Documents that fail are
+    added to quarantine and skipped, as well as the ones quarantined in previous runs. If there's
+    no quarantine, the first failure raises an ExtractionError.
+
+    processes defaults to the number of cpus available (same as multiprocessing.Pool).
+    Any other option (e.g. cache, max_pages, stop, or a fetch.Fetcher for remote documents) is
+    forwarded to pdf_parser.get_text, so it must be picklable.
+    """
+    limits = limits or Limits()
+    pending: Dict[int, Optional[List[List[str]]]] = {}
+    schedule = []
+    for i, pdf_path in enumerate(pdf_paths):
+        if quarantine is not None and pdf_path in quarantine:
+            pending[i] = None
+        else:
+            schedule.append(i)
+    schedule.sort(key=lambda i: _document_size(pdf_paths[i], local), reverse=True)
+
+    next_index = 0
+    tasks = [(i, pdf_paths[i], local, limits, text_options) for i in schedule]
+    for index, pages, failure in _run_tasks(tasks, processes, limits):
+        if failure is not None:
+            if quarantine is None:
+                raise ExtractionError(pdf_paths[index], *failure)
+            quarantine.add(pdf_paths[index], *failure)
+        if not ordered:
+            if pages is not None:
+                yield pdf_paths[index], pages
+            continue
+        pending[index] = pages
+        while next_index in pending:
+            ready = pending.pop(next_index)
+            if ready is not None:
+                yield pdf_paths[next_index], ready
+            next_index += 1
+
+
+def _new_pool(processes: int, limits: Limits) -> Pool:
+    # recycling workers after each document releases the memory of large documents
+    maxtasksperchild = 1 if limits.memory_limit else None
+    return Pool(processes, _init_worker, (limits.memory_limit, ), maxtasksperchild)
+
+
+def _run_tasks(tasks: List[_Task], processes: Optional[int], limits: Limits) -> Iterator[_Result]:
+    """
+    Runs _extract_document for each task, returning the results as they finish.
+
+    Only as many tasks as processes are submitted at once, so each task starts as soon as it's
+    submitted. With a document_timeout, the parent also gives up on a task that doesn't return
+    in time (e.g. its worker was killed, or is stuck in a call the alarm can't interrupt), and
+    reports it as a document_timeout. The pool is then replaced and the other running tasks are
+    submitted again.
+    """
+    processes = processes or os.cpu_count() or 1
+    deadline = limits.document_timeout + _DEADLINE_SLACK if limits.document_timeout else None
+    queue = deque(tasks)
+    running: Dict[int, Tuple[_Task, AsyncResult, float]] = {}
+    pool = _new_pool(processes, limits)
+    try:
+        while queue or running:
+            while queue and len(running) < processes:
+                task = queue.popleft()
+                running[task[0]] = (task, pool.apply_async(_extract_document,
+                                                           (task, )), time.monotonic())
+            finished = [index for index, (_, result, _) in running.items() if result.ready()]
+            for index in finished:
+                _, result, _ = running.pop(index)
+                yield result.get()
+            if finished:
+                continue
+            now = time.monotonic()
+            expired = [
+                index for index, (_, _, submitted) in running.items()
+                if deadline is not None and now - submitted > deadline
+            ]
+            if not expired:
+                time.sleep(_POLL_INTERVAL)
+                continue
+            for index in expired:
+                del running[index]
+                yield index, None, ('document_timeout', f'no result after {deadline:.1f}s')
+            pool.terminate()
+            pool.join()
+            pool = _new_pool(processes, limits)
+            queue.extendleft(task for task, _, _ in reversed(list(running.values())))
+            running.clear()
+    finally:
+        pool.terminate()
+        pool.join()
@@ -1,7 +1,6 @@
 from io import BytesIO, StringIO
-from typing import Iterable, List
+from typing import Callable, Iterable, List, Optional
 
-import requests
 from pdfminer.converter import TextConverter
 from pdfminer.layout import LAParams
 from pdfminer.pdfdocument import PDFDocument
@@ -9,28 +8,116 @@ from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
 from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFParser
 
+from papeles.utils.fetch import Fetcher, get_fetcher
+from papeles.utils.text_cache import TextCache
 
-def get_document(path: str, local=True):
+# Extraction profiles, from slower and more accurate to faster and less accurate:
+#  - full: pdfminer default layout analysis. Lines, words and text boxes are grouped and boxes
+#          are ordered hierarchically, which gives the best reading order for multi-column papers
+#          but it's where most of the CPU time goes.
+#  - fast: lines and words are still grouped, but text boxes are ordered by position only
+#          (boxes_flow=None) skipping the hierarchical grouping, which grows quadratically
+#          with the number of text boxes in a page. Lines are the same, but columns and
+#          floats might be interleaved, which is fine for sentence and keyword extraction.
+#  - none: no layout analysis at all, characters are written in the order they are drawn.
+#          Fastest, but there are no line breaks within a page and words are only separated if
+#          the pdf draws the spaces, so header and section detection won't work.
+# See benchmark.compare_profiles to measure the speed and token difference on a sample corpus.
+PROFILES = ('full', 'fast', 'none')
+
+
+def get_document(path: str, local=True, fetcher: Optional[Fetcher] = None):
     """
-    Loads document from path and returns an BytesIO object
+    Loads document from path and returns a binary file object.
+
+    Remote documents are streamed using fetcher, or the shared fetch.get_fetcher() by default.
     """
     if local:
         return open(path, 'rb')
-    file_r = requests.get(path)
-    return BytesIO(file_r.content)
+    return (fetcher or get_fetcher()).fetch(path)
 
 
-def get_text(pdf_path: str, local: bool) -> Iterable[List[str]]:
+def get_laparams(profile: str = 'full') -> Optional[LAParams]:
+    """
+    Layout parameters for an extraction profile (see PROFILES)
+    """
+    if profile == 'full':
+        return LAParams()
+    if profile == 'fast':
+        return LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+    if profile == 'none':
+        return None
+    raise ValueError(f'unknown extraction profile {profile}, expected one of {PROFILES}')
+
+
+def get_text(pdf_path: str,
+             local: bool,
+             cache: Optional[TextCache] = None,
+             max_pages: Optional[int] = None,
+             stop: Optional[Callable[[str], bool]] = None,
+             profile: str = 'full',
+             fetcher: Optional[Fetcher] = None) -> Iterable[List[str]]:
     """
     Given a pdf file path, returns an Iterable[str] where each string is a line in the pdf file.
+
+    If a cache is given, pages are replayed from it when the same pdf was already extracted with
+    the same layout parameters. Otherwise the pdf is parsed and stored in the cache once all of
+    its pages have been extracted.
+
+    Extraction can be stopped early, which avoids interpreting the remaining pages at all:
+     - max_pages: maximum number of pages to extract
+     - stop: predicate over lines (e.g. paper.is_header_end), extraction stops after the
+             first page with a line matching it
+
+    Early stopped extractions are not stored in the cache, but they are served from it.
+
+    profile selects how much layout analysis is done (see PROFILES), and remote documents are
+    downloaded with fetcher (see get_document).
+    """
+    laparams = get_laparams(profile)
+    if cache is None:
+        with get_document(pdf_path, local, fetcher) as fp:
+            yield from _limit_pages(_extract_pages(fp, laparams), max_pages, stop)
+        return
+    with get_document(pdf_path, local, fetcher) as fp:
+        data = fp.read()
+    key = cache.key(data, vars(laparams) if laparams else None)
+    pages = cache.get(key)
+    if pages is not None:
+        yield from _limit_pages(pages, max_pages, stop)
+        return
+    if max_pages is not None or stop is not None:
+        yield from _limit_pages(_extract_pages(BytesIO(data), laparams), max_pages, stop)
+        return
+    pages = []
+    for page in _extract_pages(BytesIO(data), laparams):
+        pages.append(page)
+        yield page
+    cache.put(key, pages)
+
+
+def _limit_pages(pages: Iterable[List[str]],
+                 max_pages: Optional[int] = None,
+                 stop: Optional[Callable[[str], bool]] = None) -> Iterable[List[str]]:
+    """
+    Lazily consumes pages until max_pages is reached or a page has a line matching stop
     """
-    fp = get_document(pdf_path, local)
+    if max_pages is not None and max_pages <= 0:
+        return
+    for i, page in enumerate(pages):
+        yield page
+        if max_pages is not None and i + 1 >= max_pages:
+            return
+        if stop is not None and any(stop(line) for line in page):
+            return
+
+
+def _extract_pages(fp, laparams: Optional[LAParams]) -> Iterable[List[str]]:
     document = PDFDocument(PDFParser(fp))
     if not document.is_extractable:
-        return []
+        return
     rsrcmgr = PDFResourceManager()
     retstr = StringIO()
-    laparams = LAParams()
     device = TextConverter(rsrcmgr, retstr, codec='utf-8', laparams=laparams)
     interpreter = PDFPageInterpreter(rsrcmgr, device)
     for page in PDFPage.create_pages(document):
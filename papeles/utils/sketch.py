@@ -0,0 +1,84 @@
+import hashlib
+import math
+import pickle
+from typing import Iterable, List
+
+import numpy as np
+
+
+class CountMinSketch:
+    """
+    Approximate counts of terms in a fixed amount of memory, no matter how many distinct terms
+    are counted.
+
+    Counts are never underestimated, and with probability 1 - delta a count is overestimated
+    by at most epsilon times the total of all counts. The table has ceil(e / epsilon) columns
+    and ceil(ln(1 / delta)) rows, e.g. 2719 x 5 counters (~100KB) for epsilon=0.001 and
+    delta=0.01.
+
+    Terms are hashed with blake2b, so the same term maps to the same counters across runs and
+    processes, and sketches with the same epsilon and delta can be saved and merged.
+    """
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, terms: List[str]) -> np.ndarray:
+        """
+        Column of each term in each row (terms x depth), using double hashing
+        """
+        digests = np.frombuffer(b''.join(
+            hashlib.blake2b(term.encode('utf-8'), digest_size=16).digest() for term in terms),
+                                dtype=np.uint64).reshape(-1, 2)
+        rows = np.arange(self.depth, dtype=np.uint64)
+        return ((digests[:, :1] + rows * digests[:, 1:]) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, terms: Iterable[str]) -> None:
+        """
+        Counts each occurrence of each term
+        """
+        terms = list(terms)
+        if not terms:
+            return
+        columns = self._columns(terms)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[:, row], minlength=self.width)
+        self.total += len(terms)
+
+    def query(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Approximate count of each term
+        """
+        terms = list(terms)
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(terms)
+        return self.table[np.arange(self.depth), columns].min(axis=1)
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        """
+        Adds the counts of other, which must have the same epsilon and delta
+        """
+        if self.table.shape != other.table.shape:
+            raise ValueError('Only sketches with the same epsilon and delta can be merged')
+        self.table += other.table
+        self.total += other.total
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            pickle.dump((self.epsilon, self.delta, self.table, self.total),
+                        f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'CountMinSketch':
+        with open(path, 'rb') as f:
+            epsilon, delta, table, total = pickle.load(f)
+        sketch = cls(epsilon, delta)
+        sketch.table = table
+        sketch.total = total
+        return sketch
@@ -1,6 +1,9 @@
+import os
+import pickle
 import re
 from collections import Counter, defaultdict
-from typing import Dict, Iterable, List, Optional
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List, Match, Optional, Union
 
 from nltk.stem import PorterStemmer
 
@@ -89,6 +92,28 @@ _STOPWORDS = frozenset({
     "thoroughly", "three", "well", "wonder"
 })
 
+# characters ignored by keep_word
+_KEEP_WORD_TABLE = str.maketrans('', '', '-,.!?')
+
+# characters removed or replaced by ngrams
+_NGRAMS_TABLE = str.maketrans({**dict.fromkeys(")(.|[]{}'"), '&': 'and', ',': ' ', '-': ' '})
+
+_WORD_RE = re.compile(r'\w+')
+
+# "." and spaces are collapsed into a single space
+_SPACES_RE = re.compile(r'[\s.]+')
+# remove all non name related characters (\w, '-' and "'"), digits and '_' matched by \w
+_NON_WORD_CHARS_RE = re.compile(r"[^\w\-'\s.]|\d|_")
+# same for lowercase ascii text, where that leaves only letters
+_ASCII_NON_WORD_CHARS_RE = re.compile(r"[^a-z\-'\s.]+")
+_LONE_HYPHEN_RE = re.compile(r'(^|\s+)-(\s+|$)')
+
+# terms mapping of each process_contents worker
+_WORKER_STATE: Dict[str, Optional['TermMapper']] = {}
+
+# last mapping used by process_content, with its TermMapper (see get_term_mapper)
+_LAST_TERM_MAPPER: Dict[str, Any] = {}
+
 
 def fix_text(text: str) -> str:
     """
@@ -104,12 +129,8 @@ def ngrams(string: str, n: int = 3) -> List[str]:
     string = fix_text(string)  # fix text encoding issues
     string = string.encode("ascii", errors="ignore").decode()  # remove non ascii chars
     string = string.lower()  # make lower case
-    chars_to_remove = [")", "(", ".", "|", "[", "]", "{", "}", "'"]
-    rx = '[' + re.escape(''.join(chars_to_remove)) + ']'
-    string = re.sub(rx, '', string)  # remove the list of chars defined above
-    string = string.replace('&', 'and')
-    string = string.replace(',', ' ')
-    string = string.replace('-', ' ')
+    # remove )(.|[]{}' and replace "&" with "and", and "," and "-" with spaces
+    string = string.translate(_NGRAMS_TABLE)
     string = string.title()  # normalise case - capital at start of each word
     string = re.sub(' +', ' ',
                     string).strip()  # get rid of multiple spaces and replace with a single space
@@ -125,7 +146,7 @@ def keep_word(token: str) -> bool:
         1. removing some characters
         2. checking if the remaining characters are alphanumeric
     """
-    return ''.join([x for x in token if x not in '-,.!?']).isalnum()
+    return token.translate(_KEEP_WORD_TABLE).isalnum()
 
 
 def ngrams_simple(text, n):
@@ -145,14 +166,15 @@ def _clean_text(text):
     text = text.replace('<i>', '')  # skip / clean anything related to html
     text = text.replace('<\\i>', '')  # skip / clean anything related to html
 
-    text = re.sub(r"[^\w\-\'\s\.]", '',
-                  text)  # remove all non name related characters (\w, '-' and "'")
-    text = re.sub(r'\d|\_|\*', '', text)  # remove digits, '_' and '*' which are matched by \w
-    text = re.sub(r'(^|\s+)-(\s+|$)', '', text)  # remove "-" when not used in between a word
-    text = re.sub(r'\.+', ' ', text)  # remove "." when it's at the end of the sentence
-    text = re.sub(r'\s+', ' ', text).strip()  # clean all extra spaces
+    if text.isascii():
+        text = _ASCII_NON_WORD_CHARS_RE.sub('', text)
+    else:
+        text = _NON_WORD_CHARS_RE.sub('', text)
+    if '-' in text:
+        text = _LONE_HYPHEN_RE.sub('', text)  # remove "-" when not used in between a word
+    text = _SPACES_RE.sub(' ', text).strip()  # "." at the end of sentences and extra spaces
     if text.count("'") > 1:
-        text = re.sub(r'\'', '', text)
+        text = text.replace("'", '')
     return text
 
 
@@ -164,42 +186,172 @@ def _tokenizer(sentence: str) -> Iterable[str]:
     yield from sentence.split(' ')
 
 
-def _remove_stopwords(sentence_tokens: Iterable[str]) -> Iterable[str]:
+class TermMapper:
+    """
+    Replaces every term of a mapping (case insensitive, whole words only) in a single pass.
+
+    Terms made only of word characters (e.g. from get_stem_mapping) are looked up in a dict for
+    each word of the sentence, and any other term is compiled once into a single pattern, so the
+    cost of mapping a sentence doesn't grow with the size of the mapping.
+
+    Unlike replacing one term after another, replaced text is not mapped again and longer phrases
+    win over the terms they contain, which only makes a difference for overlapping mappings
+    (e.g. a -> b and b -> c). Stem mappings (see get_stem_mapping) are mapped the same way.
+    """
+    def __init__(self, terms_mapping: Dict[str, str]):
+        self._mapping: Dict[str, str] = {}
+        for term, mapping in terms_mapping.items():
+            self._mapping.setdefault(term.lower(), mapping)
+        # longest first, so a phrase is replaced before any phrase contained in it
+        phrases = sorted((t for t in self._mapping if not _WORD_RE.fullmatch(t)),
+                         key=len,
+                         reverse=True)
+        pattern = r'\w+'
+        if phrases:
+            pattern = rf'\b(?:{"|".join(map(re.escape, phrases))})\b|{pattern}'
+        self._pattern = re.compile(pattern, flags=re.I)
+
+    def _replace(self, match: Match) -> str:
+        term = match.group()
+        return self._mapping.get(term.lower(), term)
+
+    def __call__(self, sentence: str) -> str:
+        return self._pattern.sub(self._replace, sentence)
+
+
+def get_term_mapper(terms_mapping: Dict[str, str]) -> TermMapper:
     """
-    Exclude any stop word in the input set of tokens
+    TermMapper for terms_mapping, reusing the last one built for the same dict object.
+
+    The mapping is not compared on each call, so it must not be modified after it's first used
+    (build a TermMapper and pass it to process_content instead when it changes).
     """
-    yield from [x for x in sentence_tokens if x.lower() not in _STOPWORDS]
+    if _LAST_TERM_MAPPER.get('terms_mapping') is not terms_mapping:
+        _LAST_TERM_MAPPER.update(terms_mapping=terms_mapping, mapper=TermMapper(terms_mapping))
+    return _LAST_TERM_MAPPER['mapper']
 
 
-def process_content(sentence: str, terms_mapping: Optional[Dict[str, str]] = None) -> List[str]:
+def process_content(sentence: str,
+                    terms_mapping: Optional[Union[Dict[str, str], TermMapper]] = None) -> List[str]:
     """
-    Process any input sentence using a dictionary of terms to be mapped, and returning
-    a clean set of tokens excluding all stop words.
+    Process any input sentence using a dictionary of terms to be mapped (or a TermMapper built
+    from it), and returning a clean set of tokens excluding all stop words.
+
+    A dictionary is compiled once and reused while the same dict is given (see get_term_mapper).
     """
     if terms_mapping:
-        for term, mapping in terms_mapping.items():
-            sentence = re.sub(rf'\b{term}\b', mapping, sentence, flags=re.I)
-    return list(_remove_stopwords(_tokenizer(_clean_text(sentence))))
+        if not isinstance(terms_mapping, TermMapper):
+            terms_mapping = get_term_mapper(terms_mapping)
+        sentence = terms_mapping(sentence)
+    # tokens from _clean_text are already lowercase, so stop words are excluded without lower()
+    return [x for x in _tokenizer(_clean_text(sentence)) if x not in _STOPWORDS]
+
+
+def process_contents(documents: Iterable[str],
+                     terms_mapping: Optional[Union[Dict[str, str], TermMapper]] = None,
+                     processes: Optional[int] = None,
+                     chunksize: int = 64) -> Iterator[List[str]]:
+    """
+    Batch version of process_content, yielding the tokens of each document in order.
+
+    If processes is given, documents are processed in chunks by a pool of processes, where the
+    terms mapping is sent once to each process, otherwise they are processed one at a time.
+    """
+    if terms_mapping and not isinstance(terms_mapping, TermMapper):
+        terms_mapping = TermMapper(terms_mapping)
+    if processes is None:
+        for document in documents:
+            yield process_content(document, terms_mapping)
+        return
+    with Pool(processes, _init_worker, (terms_mapping, )) as pool:
+        yield from pool.imap(_process_document, documents, chunksize)
+
+
+def _init_worker(terms_mapping: Optional[TermMapper]) -> None:
+    _WORKER_STATE['terms_mapping'] = terms_mapping
+
+
+def _process_document(document: str) -> List[str]:
+    return process_content(document, _WORKER_STATE['terms_mapping'])
 
 
 def generate_ngram_text(text: str, ngram: int) -> List[str]:
-    return ['_'.join(x) for x in ngrams_simple(' '.join(process_content(text)), ngram)]
+    return _join_ngrams(process_content(text), ngram)
 
 
-def get_stem_mapping(corpus_words: List[str]) -> Dict[str, str]:
-    porter = PorterStemmer()
-    stem_mapping: Dict[str, List[str]] = defaultdict(list)
-    for w in corpus_words:
-        stem = porter.stem(w)
-        stem_mapping[stem].append(w)
+def generate_ngrams_text(
+        text: str,
+        orders: Iterable[int] = (1, 2, 3),
+        terms_mapping: Optional[Union[Dict[str, str], TermMapper]] = None) -> Dict[int, List[str]]:
+    """
+    generate_ngram_text for several n-gram orders at once (e.g. 1 to 3), so the text is
+    processed (see process_content) only once. Returns the n-grams by order.
+    """
+    tokens = process_content(text, terms_mapping)
+    return {n: _join_ngrams(tokens, n) for n in orders}
+
+
+def _join_ngrams(tokens: List[str], n: int) -> List[str]:
+    """
+    Same as ngrams_simple on the joined tokens, with each n-gram joined by "_"
+    """
+    tokens = tokens or ['']  # joining no tokens gives a single empty word
+    return ['_'.join(tokens[i:i + n]) for i in range(len(tokens) - (n - 1))]
+
 
-    to_delete = [k for k, v in stem_mapping.items() if len(set(v)) == 1]
-    for i in to_delete:
-        del stem_mapping[i]
+def get_stem_mapping(corpus_words: List[str],
+                     stem_cache: Optional[str] = None,
+                     processes: Optional[int] = None) -> Dict[str, str]:
+    """
+    Maps each word to the most frequent word in the corpus with the same stem (Porter), for the
+    stems shared by more than one word. Ties are broken by the first word in the corpus.
+
+    Each distinct word is stemmed only once. The stems can be kept in a stem_cache file
+    (pickle) to be reused across runs, and the words missing from it can be stemmed by a pool
+    of processes.
+    """
+    word_counts = Counter(corpus_words)
+    stems = _load_stems(stem_cache)
+    missing = [w for w in word_counts if w not in stems]
+    if missing:
+        if processes is None:
+            stems.update(zip(missing, _stem_words(missing)))
+        else:
+            chunks = [missing[i::processes * 4] for i in range(processes * 4)]
+            with Pool(processes) as pool:
+                for chunk, chunk_stems in zip(chunks, pool.map(_stem_words, chunks)):
+                    stems.update(zip(chunk, chunk_stems))
+        if stem_cache:
+            _save_stems(stem_cache, stems)
+
+    stem_mapping: Dict[str, List[str]] = defaultdict(list)
+    for w in word_counts:
+        stem_mapping[stems[w]].append(w)
 
     main_stem_mapping = {}
-    for _, word_list in stem_mapping.items():
-        max_freq_word = sorted(Counter(word_list).items(), key=lambda x: x[1], reverse=True)[0]
-        for w in set(word_list):
-            main_stem_mapping[w] = max_freq_word[0]
+    for word_list in stem_mapping.values():
+        if len(word_list) == 1:
+            continue
+        max_freq_word = max(word_list, key=word_counts.__getitem__)
+        for w in word_list:
+            main_stem_mapping[w] = max_freq_word
     return main_stem_mapping
+
+
+def _stem_words(words: List[str]) -> List[str]:
+    porter = PorterStemmer()
+    return [porter.stem(w) for w in words]
+
+
+def _load_stems(path: Optional[str]) -> Dict[str, str]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _save_stems(path: str, stems: Dict[str, str]) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(stems, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
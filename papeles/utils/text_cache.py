@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+class TextCache:
+    """
+    Persistent cache for the pages extracted by pdf_parser.get_text.
+
+    Entries are keyed by a hash of the pdf bytes plus the layout parameters used to extract them,
+    so a file is parsed again only if its content or the extraction settings change.
+
+    Entries live in a single sqlite database, which takes care of locking when several worker
+    processes read and write at the same time. The total size of the stored entries is capped
+    by max_size (in bytes), evicting the least recently used entries first.
+    """
+
+    def __init__(self, folder: str, max_size: int = 2 * 1024**3, timeout: float = 60.0):
+        self.folder = folder
+        self.max_size = max_size
+        self.timeout = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Connections can't be shared across processes, so only the settings are pickled
+        """
+        return {'folder': self.folder, 'max_size': self.max_size, 'timeout': self.timeout}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(self.folder, exist_ok=True)
+            self._connection = sqlite3.connect(os.path.join(self.folder, 'pages.sqlite'),
+                                               timeout=self.timeout,
+                                               isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def key(data: bytes, settings: Any) -> str:
+        """
+        Content-addressed key for a pdf file (as bytes) and the settings used to extract it
+        """
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[List[str]]]:
+        """
+        Returns the cached pages for key, or None if they are not in the cache
+        """
+        row = self.connection.execute('SELECT data FROM pages WHERE key = ?', (key, )).fetchone()
+        if row is None:
+            return None
+        self.connection.execute('UPDATE pages SET accessed = ? WHERE key = ?', (time.time(), key))
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def put(self, key: str, pages: List[List[str]]) -> None:
+        """
+        Stores the pages for key, evicting the least recently used entries if the cache is full
+        """
+        data = zlib.compress(json.dumps(pages).encode('utf-8'))
+        if len(data) > self.max_size:
+            return
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                               (key, data, len(data), time.time()))
+            self._evict(connection)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_size:
+            return
+        for key, size in connection.execute(
+                'SELECT key, size FROM pages ORDER BY accessed ASC').fetchall():
+            connection.execute('DELETE FROM pages WHERE key = ?', (key, ))
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def clear(self) -> None:
+        self.connection.execute('DELETE FROM pages')
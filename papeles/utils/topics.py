@@ -1,14 +1,38 @@
-from typing import Dict, List, Optional
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from gensim import corpora, models
+from scipy.sparse import csr_matrix
 
 from papeles.utils import text as text_utils
+from papeles.utils.vocabulary import Vocabulary, as_ids
 
 
 class TopicPredictor:
     def __init__(self, topics: Dict[str, List[str]]):
         self.topics = topics
         self.n_grams = len(list(topics.values())[0][0].split('_'))
+        self.topic_names = list(topics)
+        # topics of each term id, and the same as a terms x topics matrix
+        self.vocabulary = Vocabulary()
+        self.term_topics: List[List[int]] = []
+        for topic_id, terms in enumerate(topics.values()):
+            for term in dict.fromkeys(terms):
+                term_id = self.vocabulary.add(term)
+                if term_id == len(self.term_topics):
+                    self.term_topics.append([])
+                self.term_topics[term_id].append(topic_id)
+        rows = [term_id for term_id, topic_ids in enumerate(self.term_topics) for _ in topic_ids]
+        cols = [topic_id for topic_ids in self.term_topics for topic_id in topic_ids]
+        self.term_topics_matrix = csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                                             shape=(len(self.vocabulary), len(self.topic_names)))
+
+    def _term_ids(self, n_grams_doc: List[str]) -> np.ndarray:
+        """
+        Unique ids of the topic terms found in a document
+        """
+        return np.unique(as_ids(self.vocabulary.lookup(n_grams_doc)))
 
     def predict_topics(self, document: str) -> Dict[str, float]:
         """
@@ -17,11 +41,49 @@ class TopicPredictor:
         n_grams_doc = text_utils.generate_ngram_text(document, self.n_grams)
         predictions = {}
         if len(n_grams_doc) > 0:
-            for topic, terms in self.topics.items():
-                predictions[topic] = len(set(n_grams_doc).intersection(
-                    set(terms))) / len(n_grams_doc)
+            matches = [0] * len(self.topic_names)
+            for term_id in self._term_ids(n_grams_doc).tolist():
+                for topic_id in self.term_topics[term_id]:
+                    matches[topic_id] += 1
+            for topic, topic_matches in zip(self.topic_names, matches):
+                predictions[topic] = topic_matches / len(n_grams_doc)
         return predictions
 
+    def predict_many(self, documents: Iterable[str]) -> csr_matrix:
+        """
+        Same as predict_topics for many documents at once, returning a sparse matrix of documents x
+        topics (see topic_names) where topics not found in a document are not stored
+        """
+        term_ids: List[np.ndarray] = []
+        lengths: List[int] = []
+        for document in documents:
+            n_grams_doc = text_utils.generate_ngram_text(document, self.n_grams)
+            lengths.append(len(n_grams_doc))
+            term_ids.append(self._term_ids(n_grams_doc))
+        rows = np.repeat(np.arange(len(lengths)), [len(ids) for ids in term_ids])
+        cols = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.intp)
+        found = csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                           shape=(len(lengths), len(self.vocabulary)))
+        matches = (found @ self.term_topics_matrix).tocsr()
+        matches.eliminate_zeros()
+        matches.sort_indices()
+        scores = matches.data / np.repeat(np.array(lengths), np.diff(matches.indptr))
+        return csr_matrix((scores, matches.indices, matches.indptr), shape=matches.shape)
+
+    def top_topics(self, scores: csr_matrix, top: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Top topics (with their score) of each document in a matrix from predict_many, ranked by
+        score and then by topic order
+        """
+        rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+        order = np.lexsort((scores.indices, -scores.data, rows))
+        ranks = np.arange(len(order)) - scores.indptr[rows]
+        top_topics: List[List[Tuple[str, float]]] = [[] for _ in range(scores.shape[0])]
+        for position in order[ranks < top]:
+            top_topics[rows[position]].append(
+                (self.topic_names[scores.indices[position]], float(scores.data[position])))
+        return top_topics
+
 
 class Topics:
     def __init__(self,
@@ -36,15 +98,17 @@ class Topics:
         self.corpus = corpus
         self.random_state = random_state
         self.topics = self._get_topics()
+        self._predictor: Optional[TopicPredictor] = None
 
     @staticmethod
-    def _match_doc(doc_n_grams: List[str], keywords: List[str]):
+    def _match_doc(doc_ids: array, keyword_ids: np.ndarray) -> np.ndarray:
         """
-        Very simple strategy for matching keywords to a document
+        Very simple strategy for matching keywords to a document (both encoded with the same
+        vocabulary), returning the ids of the keywords found
 
         TODO: this can be refactored into a much robust version.
         """
-        return list(set(doc_n_grams).intersection(set(keywords)))
+        return np.intersect1d(as_ids(doc_ids), keyword_ids)
 
     @staticmethod
     def _extract_topics(model) -> Dict[str, List[str]]:
@@ -70,12 +134,15 @@ class Topics:
 
         Default is 100 topics with 10 terms per topic.
         """
+        vocabulary = Vocabulary(self.keywords)
+        keyword_ids = np.arange(len(vocabulary))
         text_list = []
         for document in self.corpus:
-            new_document = self._match_doc(text_utils.generate_ngram_text(document, self.n_grams),
-                                           self.keywords)
+            new_document = self._match_doc(
+                vocabulary.lookup(text_utils.generate_ngram_text(document, self.n_grams)),
+                keyword_ids)
             if len(new_document) > 1:
-                text_list.append(new_document)
+                text_list.append(vocabulary.decode(new_document.tolist()))
 
         dictionary = corpora.Dictionary(text_list)
         corpus = [dictionary.doc2bow(text) for text in text_list]
@@ -91,4 +158,6 @@ class Topics:
         """
         Predict which topics are more likely to be associated to the input document.
         """
-        return TopicPredictor(self.topics).predict_topics(document)
+        if self._predictor is None:
+            self._predictor = TopicPredictor(self.topics)
+        return self._predictor.predict_topics(document)
@@ -0,0 +1,90 @@
+import pickle
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+# documents are stored as arrays of unsigned int term ids
+_TYPECODE = 'I'
+
+
+class Vocabulary:
+    """
+    Interns terms (e.g. tokens or "_" joined n-grams from text.generate_ngram_text) to integer
+    ids, assigned in order of first appearance.
+
+    Documents are encoded as compact arrays of term ids instead of lists of strings, so each
+    distinct term is stored once per corpus, and counting can be done on integer arrays, e.g.
+
+        vocabulary = Vocabulary()
+        documents = vocabulary.encode_many(text_list)
+        counts, _ = keywords.term_count_matrix(documents, len(vocabulary))
+    """
+    def __init__(self, terms: Iterable[str] = ()):
+        self.terms: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: str) -> int:
+        """
+        Id of term, adding it to the vocabulary if it's new
+        """
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def encode(self, document: Iterable[str]) -> array:
+        """
+        Array with the id of each term in document, adding any new term to the vocabulary
+        """
+        return array(_TYPECODE, map(self.add, document))
+
+    def encode_many(self, documents: Iterable[Iterable[str]]) -> List[array]:
+        return [self.encode(document) for document in documents]
+
+    def decode(self, document: Iterable[int]) -> List[str]:
+        return [self.terms[term_id] for term_id in document]
+
+    def lookup(self, document: Iterable[str]) -> array:
+        """
+        Array with the id of each term in document that is already in the vocabulary, skipping
+        unknown terms instead of adding them
+        """
+        ids = self.ids
+        return array(_TYPECODE, (ids[term] for term in document if term in ids))
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            pickle.dump(self.terms, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'Vocabulary':
+        vocabulary = cls()
+        with open(path, 'rb') as f:
+            vocabulary.terms = pickle.load(f)
+        vocabulary.ids = {term: term_id for term_id, term in enumerate(vocabulary.terms)}
+        return vocabulary
+
+    def __getitem__(self, term: str) -> int:
+        return self.ids[term]
+
+    def __contains__(self, term: object) -> bool:
+        return term in self.ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+def as_ids(document: Sequence[int]) -> np.ndarray:
+    """
+    NumPy view of an encoded document (see Vocabulary.encode), without copying it
+    """
+    if isinstance(document, array):
+        return np.frombuffer(document, dtype=np.uintc) if document else np.zeros(0, np.intp)
+    return np.asarray(document, dtype=np.intp)
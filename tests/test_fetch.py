@@ -0,0 +1,116 @@
+"""
+Tests for papeles.utils.fetch against a local HTTP server.
+"""
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from papeles.utils import fetch, pdf_parser
+
+BODY = b'%PDF-1.4 test body' * 1000
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    /paper.pdf: BODY with an ETag, 304 when it matches If-None-Match
+    /flaky/<n>.pdf: 503 for the first n requests, then BODY
+    anything else: 404
+    """
+    requests: Counter = Counter()
+    responses: Counter = Counter()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.requests[self.path] += 1
+        if self.path == '/paper.pdf':
+            if self.headers.get('If-None-Match') == ETAG:
+                self._respond(304)
+            else:
+                self._respond(200, BODY, {'ETag': ETAG})
+        elif self.path.startswith('/flaky/'):
+            failures = int(self.path.split('/')[-1].split('.')[0])
+            self._respond(503 if self.requests[self.path] <= failures else 200, BODY)
+        else:
+            self._respond(404)
+
+    def _respond(self, status, body=b'', headers=None):
+        self.responses[(self.path, status)] += 1
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.requests.clear()
+    _Handler.responses.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_without_cache(server):
+    fetcher = fetch.Fetcher(max_memory=1024)
+    for _ in range(2):
+        with fetcher.fetch(f'{server}/paper.pdf') as f:
+            assert f.read() == BODY
+    assert _Handler.responses[('/paper.pdf', 200)] == 2
+
+
+def test_fetch_reuses_cache_when_not_modified(server, tmp_path):
+    fetcher = fetch.Fetcher(cache_folder=str(tmp_path))
+    for _ in range(3):
+        with fetcher.fetch(f'{server}/paper.pdf') as f:
+            assert f.read() == BODY
+    assert _Handler.responses[('/paper.pdf', 200)] == 1
+    assert _Handler.responses[('/paper.pdf', 304)] == 2
+    assert not list(tmp_path.glob('*.part'))
+
+
+def test_fetch_retries(server):
+    fetcher = fetch.Fetcher(retries=3, backoff_factor=0)
+    with fetcher.fetch(f'{server}/flaky/2.pdf') as f:
+        assert f.read() == BODY
+    assert _Handler.requests['/flaky/2.pdf'] == 3
+    with pytest.raises(requests.exceptions.RetryError):
+        fetcher.fetch(f'{server}/flaky/5.pdf')
+    assert _Handler.requests['/flaky/5.pdf'] == 4
+
+
+def test_fetch_many(server, tmp_path):
+    fetcher = fetch.Fetcher(cache_folder=str(tmp_path), max_workers=2, backoff_factor=0)
+    urls = [f'{server}/paper.pdf', f'{server}/flaky/1.pdf', f'{server}/missing.pdf']
+    results = dict(fetcher.fetch_many(urls))
+    assert set(results) == set(urls)
+    for url in urls[:2]:
+        with results[url] as f:
+            assert f.read() == BODY
+    assert isinstance(results[urls[2]], requests.exceptions.HTTPError)
+
+
+def test_get_document_with_fetcher(server, tmp_path):
+    fetcher = fetch.Fetcher(cache_folder=str(tmp_path))
+    with pdf_parser.get_document(f'{server}/paper.pdf', local=False, fetcher=fetcher) as f:
+        assert f.read() == BODY
+    assert len(list(tmp_path.glob('*.pdf'))) == 1
+
+
+def test_configure_fetcher(tmp_path):
+    fetcher = fetch.configure_fetcher(cache_folder=str(tmp_path))
+    try:
+        assert fetch.get_fetcher() is fetcher
+        assert fetcher.cache_folder == str(tmp_path)
+    finally:
+        fetch.configure_fetcher()
@@ -0,0 +1,66 @@
+"""
+Tests for papeles.utils.keywords. get_keywords is checked against the original implementation,
+which scores every word of every document with tfidf.
+"""
+import random
+from collections import Counter
+from typing import Dict, List
+
+import pytest
+
+from papeles.utils import keywords
+
+
+def _reference_keywords(text_list: List[List[str]], top_doc_keywords: int = 20) -> Dict[str, int]:
+    keywords_counter: Counter = Counter()
+    for text in text_list:
+        scores = {word: keywords.tfidf(word, text, text_list) for word in text}
+        sorted_words = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        keywords_counter.update([x[0] for x in sorted_words[:top_doc_keywords]])
+    return dict(keywords_counter)
+
+
+def _random_corpus(seed: int, documents: int, max_words: int) -> List[List[str]]:
+    rng = random.Random(seed)
+    words = [f'word_{i}' for i in range(60)]
+    return [[rng.choice(words) for _ in range(rng.randint(0, max_words))] for _ in range(documents)]
+
+
+CORPORA = {
+    'empty': [],
+    'empty_documents': [[], [], []],
+    'single_document': [['neural', 'network', 'neural']],
+    # every word has the same score within each document, so the order is only set by ties
+    'ties': [['c', 'b', 'a'], ['a', 'b', 'c'], ['b', 'a', 'c', 'd', 'd'], []],
+    'mixed': [['deep', 'learning', 'deep', 'model'], [], ['graph', 'model', 'graph', 'graph'],
+              ['learning', 'graph', 'kernel', 'method', 'kernel'], ['model']],
+}
+CORPORA['random_short'] = _random_corpus(1, 80, 15)
+CORPORA['random_long'] = _random_corpus(2, 40, 120)
+
+
+@pytest.mark.parametrize('name', list(CORPORA))
+@pytest.mark.parametrize('top_doc_keywords', [1, 3, 20])
+def test_get_keywords_matches_tfidf(name, top_doc_keywords):
+    text_list = CORPORA[name]
+    expected = _reference_keywords(text_list, top_doc_keywords)
+    result = keywords.get_keywords(text_list, top_doc_keywords)
+    # same counts and same key order
+    assert list(result.items()) == list(expected.items())
+
+
+@pytest.mark.parametrize('name', list(CORPORA))
+def test_document_frequencies_match_get_keywords(name):
+    text_list = CORPORA[name]
+    frequencies = keywords.DocumentFrequencies(text_list)
+    assert list(frequencies.top_keywords(text_list).items()) == list(
+        keywords.get_keywords(text_list).items())
+
+
+@pytest.mark.parametrize(
+    'frequencies', [keywords.DocumentFrequencies(),
+                    keywords.ApproximateDocumentFrequencies()])
+def test_empty_frequencies(frequencies):
+    assert frequencies.top_keywords([]) == {}
+    with pytest.raises(ValueError):
+        frequencies.top_keywords([['neural', 'network']])
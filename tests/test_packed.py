@@ -0,0 +1,25 @@
+"""
+Tests for papeles.corpus.packed.
+"""
+import pytest
+
+from papeles.corpus import packed
+
+PAPER_A = {'header': ['a title'], 'abstract': ['deep', 'learning']}
+PAPER_B = {'header': ['b title'], 'abstract': []}
+RECORDS = [('paper_a', PAPER_A), ('paper_b', PAPER_B)]
+
+
+def test_write_and_read_packed(tmp_path):
+    path = str(tmp_path / 'corpus.packed')
+    assert packed.write_packed(path, RECORDS) == 2
+    with packed.PackedCorpus(path) as corpus:
+        assert dict(corpus) == dict(RECORDS)
+        assert corpus.get_field('paper_a', 'abstract') == ['deep', 'learning']
+
+
+def test_write_packed_duplicate_key(tmp_path):
+    path = tmp_path / 'corpus.packed'
+    with pytest.raises(ValueError, match='paper_a'):
+        packed.write_packed(str(path), RECORDS + [('paper_a', {'header': ['other']})])
+    assert not list(tmp_path.iterdir())
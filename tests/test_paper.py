@@ -0,0 +1,234 @@
+"""
+Tests for papeles.utils.paper. Sections are checked against the output of the original line by
+line implementation of get_header, get_abstract_sentences and get_sentences for fixed pdf lines.
+"""
+import pytest
+
+from papeles.types import ACM_TYPE
+from papeles.utils import paper
+
+NEURIPS_LINES = [
+    'Learning Sparse Representations',
+    'with Structured Dropout',
+    'Jane Doe, John Smith',
+    'Department of Computer Science',
+    'University of Somewhere',
+    'jane@somewhere.edu',
+    'Abstract',
+    'We study sparse representations learned by neural networks (NNs). Our method,',
+    'structured dropout, reaches 93.5% accuracy on CIFAR-10! Does it generalize?',
+    'We show it does: results on ImageNet [12] improve by 2.1 points.',
+    '1 Introduction',
+    'Deep networks [1, 2] are over-parameterized. Dropout randomly removes units',
+    'during training (Srivastava et al., 2014).',
+    'Figure',
+    'In this paper we propose a structured variant, e.g. dropping whole channels.',
+    '2 Related work',
+    'Sparse coding has a long history [3].  Extra   spaces   are kept apart.',
+    'Acknowledgments',
+    'We thank the anonymous reviewers.',
+    'References',
+    '[1] A. Krizhevsky, I. Sutskever, and G. E. Hinton. ImageNet classification with deep',
+    'convolutional neural networks. In NIPS, 2012.',
+    '[2] K. He, X. Zhang, S. Ren, and J. Sun. Deep residual learning. In CVPR, 2016.',
+]
+
+ACM_LINES = [
+    'Mining Citation Graphs at Scale',
+    'Alice Example',
+    'ACM Research Lab',
+    'ABSTRACT',
+    'Citation graphs grow quickly. We present a streaming algorithm',
+    'that keeps 99% of the top-k papers in memory.',
+    'CCS CONCEPTS',
+    '• Information systems → Data mining;',
+    'KEYWORDS',
+    'citation graphs, streaming',
+    'ACM Reference Format:',
+    'Alice Example. 2019. Mining Citation Graphs at Scale. In KDD.',
+    '1 INTRODUCTION',
+    'Graphs are everywhere. Citation graphs are no exception.',
+    'REFERENCES',
+    '[1] L. Page. PageRank. 1999.',
+]
+
+NEURIPS_HEADER = [
+    'Learning Sparse Representations',
+    'with Structured Dropout',
+    'Jane Doe, John Smith',
+    'Department of Computer Science',
+    'University of Somewhere',
+    'jane@somewhere.edu',
+]
+
+NEURIPS_ABSTRACT = [
+    'We study sparse representations learned by neural networks Our method, structured dropout, '
+    'reaches accuracy on CIFAR-10!',
+    'Does it generalize?',
+    'We show it results on ImageNet improve by 2.',
+    '1 points.',
+]
+
+NEURIPS_SENTENCES = [
+    'Deep networks are over-parameterized.',
+    'Dropout randomly removes units during training et al.',
+    ', In this paper we propose a structured variant, e.',
+    'g.',
+    'dropping whole channels.',
+    '2 Related work Sparse coding has a long history Extra spaces are kept apart.',
+]
+
+ACM_HEADER = [
+    'Mining Citation Graphs at Scale',
+    'Alice Example',
+    'ACM Research Lab',
+]
+
+ACM_ABSTRACT = [
+    'Citation graphs grow quickly.',
+    'We present a streaming algorithm that keeps of the top-k papers in memory.',
+    'CCS CONCEPTS Information systems Data citation graphs, streaming ACM Reference Alice '
+    'Example.',
+    '2019.',
+    'Mining Citation Graphs at Scale.',
+    'In KDD.',
+]
+
+ACM_ACM_ABSTRACT = [
+    'Citation graphs grow quickly.',
+    'We present a streaming algorithm that keeps of the top-k papers in memory.',
+]
+
+ACM_SENTENCES = [
+    'Graphs are everywhere.',
+    'Citation graphs are no exception.',
+]
+
+
+@pytest.mark.parametrize('lines, expected', [(NEURIPS_LINES, NEURIPS_HEADER),
+                                             (ACM_LINES, ACM_HEADER)])
+def test_get_header(lines, expected):
+    assert paper.get_header(lines) == expected
+
+
+@pytest.mark.parametrize('lines, document_type, expected', [
+    (NEURIPS_LINES, None, NEURIPS_ABSTRACT),
+    (NEURIPS_LINES, ACM_TYPE, NEURIPS_ABSTRACT),
+    (ACM_LINES, None, ACM_ABSTRACT),
+    (ACM_LINES, ACM_TYPE, ACM_ACM_ABSTRACT),
+])
+def test_get_abstract_sentences(lines, document_type, expected):
+    assert paper.get_abstract_sentences(lines, document_type) == expected
+
+
+@pytest.mark.parametrize('lines, expected', [(NEURIPS_LINES, NEURIPS_SENTENCES),
+                                             (ACM_LINES, ACM_SENTENCES)])
+def test_get_sentences(lines, expected):
+    assert paper.get_sentences(lines) == expected
+
+
+def test_empty_document():
+    assert paper.get_header([]) == []
+    assert paper.get_abstract_sentences([]) == []
+    assert paper.get_sentences([]) == []
+
+
+NUMBERED_REFERENCES = [
+    'References',
+    '[1] A. Krizhevsky, I. Sutskever, and G. E. Hinton. ImageNet classification with deep',
+    'convolutional neural networks. In NIPS, 2012.',
+    '[2] K. He, X. Zhang, S. Ren, and J. Sun. Deep residual learning for image recog-',
+    'nition. In CVPR, 2016.',
+    'Appendix A Proofs',
+    'Proof of Lemma 1. It follows from the definitions.',
+]
+
+UNNUMBERED_REFERENCES = [
+    'References',
+    'Kingma, D. P. and Ba, J. Adam: A method for stochastic',
+    'optimization. In ICLR, 2015.',
+    'Loshchilov, I. and Hutter, F. Decoupled weight decay',
+    'regularization. arXiv preprint arXiv:1711.05101, 2017',
+    'Srivastava, N., Hinton, G., Krizhevsky, A., Sutskever, I., and',
+    'Salakhutdinov, R. Dropout: a simple way to prevent neural networks from',
+    'overfitting. JMLR, 15(1):1929-1958, 2014',
+    'van der Maaten, L. and Hinton, G. E. (2008). Visualizing data using t-SNE. JMLR.',
+    'A. Vaswani, N. Shazeer, et al. Attention is all you need. In NIPS, 2017',
+    'A Additional experiments',
+    'We also ran more experiments.',
+]
+
+
+def test_get_references_numbered():
+    references = paper.get_references(NUMBERED_REFERENCES)
+    assert [tuple(r[:4]) for r in references] == [
+        (['A. Krizhevsky', 'I. Sutskever', 'G. E. Hinton'],
+         'ImageNet classification with deep convolutional neural networks', 2012, 'NIPS'),
+        (['K. He', 'X. Zhang', 'S. Ren',
+          'J. Sun'], 'Deep residual learning for image recognition', 2016, 'CVPR'),
+    ]
+
+
+def test_get_references_unnumbered():
+    references = paper.get_references(UNNUMBERED_REFERENCES)
+    assert [tuple(r[:4]) for r in references] == [
+        (['D. P. Kingma', 'J. Ba'], 'Adam: A method for stochastic optimization', 2015, 'ICLR'),
+        (['I. Loshchilov', 'F. Hutter'], 'Decoupled weight decay regularization', 2017,
+         'arXiv preprint arXiv:1711.05101'),
+        (['N. Srivastava', 'G. Hinton', 'A. Krizhevsky', 'I. Sutskever',
+          'R. Salakhutdinov'], 'Dropout: a simple way to prevent neural networks from overfitting',
+         2014, 'JMLR, 15(1):1929-1958'),
+        (['L. van der Maaten', 'G. E. Hinton'], 'Visualizing data using t-SNE', 2008, 'JMLR'),
+        (['A. Vaswani', 'N. Shazeer'], 'Attention is all you need', 2017, 'NIPS'),
+    ]
+
+
+@pytest.mark.parametrize('line', [
+    'Appendix', 'Appendix A Proofs', 'Supplementary Material', 'A Proofs',
+    'B Additional experiments', 'A.1 Proof of Lemma 1', '7 Conclusion'
+])
+def test_references_end_at_next_section(line):
+    lines = ['References', '[1] A. Author. A title. In Venue, 2019.', line, 'More text.']
+    assert paper.segment(lines, sections=('references', )).references == lines[1:2]
+
+
+def test_get_references_title_ending_in_introduction():
+    lines = [
+        'References',
+        '[1] R. S. Sutton and A. G. Barto. Reinforcement Learning: An Introduction',
+        'MIT Press, 1998.',
+        '[2] D. Silver et al. Mastering the game of Go without human knowledge. Nature, 2017.',
+        '[3] V. Mnih et al. Human-level control through deep reinforcement learning. Nature, 2015.',
+    ]
+    references = paper.get_references(lines)
+    assert [(r.title, r.year) for r in references] == [
+        ('Reinforcement Learning: An Introduction MIT Press, 1998', 1998),
+        ('Mastering the game of Go without human knowledge', 2017),
+        ('Human-level control through deep reinforcement learning', 2015),
+    ]
+
+
+def test_get_references_wrapped_year():
+    lines = [
+        'References',
+        '1. K. He, X. Zhang, S. Ren, and J. Sun. Deep residual learning for image recognition.',
+        'In CVPR, pages 770-778,',
+        '2016.',
+        '2. S. Ioffe and C. Szegedy. Batch normalization. In ICML, 2015.',
+    ]
+    references = paper.get_references(lines)
+    assert [(r.title, r.year, r.venue) for r in references] == [
+        ('Deep residual learning for image recognition', 2016, 'CVPR, pages 770-778'),
+        ('Batch normalization', 2015, 'ICML'),
+    ]
+
+
+def test_references_continue_after_capitalized_title_line():
+    lines = [
+        'References',
+        '[1] J. Smith and K. Lee. Evidence, priors and',
+        'A Bayesian approach to model selection',
+        'for neural networks. In NIPS, 2012.',
+        '[2] A. Author. A title. In Venue, 2019.',
+    ]
+    assert paper.segment(lines, sections=('references', )).references == lines[1:]